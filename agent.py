@@ -1,8 +1,28 @@
 # agent.py
+import math
 import random
 import json
-import ast
 import os
+from collections import Counter, deque
+import numpy as np
+from checkpoint import atomic_write
+from core import DELTAS
+from learners import QLearner
+from model_format import (
+    BINARY_EXTENSION,
+    is_binary_model,
+    read_binary_model,
+    write_binary_model,
+)
+from qtable import make_qtable
+from state import (
+    CELL_BITS,
+    CELL_MASK,
+    CELLS,
+    decode_state,
+    parse_state_key,
+    state_key,
+)
 
 
 class QLearningAgent:
@@ -17,8 +37,16 @@ class QLearningAgent:
         exploration_rate=0.2,
         exploration_decay=0.0999,
         verbose=False,
+        qtable="dict",
+        learner=None,
+        rng=None,
+        q_temperature=1.0,
     ):
         self.actions = actions
+        # Générateurs propres à l'agent : random.Random pour les choix un
+        # par un, et un Generator NumPy, dérivé du premier, pour les lots
+        self.rng = rng if rng is not None else random.Random()
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
         self.score_rate = score_rate
         self.heatmap_rate = heatmap_rate
         self.learning_rate = learning_rate
@@ -26,12 +54,18 @@ class QLearningAgent:
         self.min_exploration = min_exploration
         self.exploration_rate = exploration_rate
         self.exploration_decay = exploration_decay
-        self.q_table = {}
+        self.q_table = make_qtable(qtable, len(actions))
+        # Température du tirage entre actions à égalité (voir choose_action)
+        self.q_temperature = q_temperature
+        # Règle de mise à jour de la Q-table (voir learners.py)
+        self.learner = learner if learner is not None else QLearner()
         self.discovered_objects = {}
         self.verbose = verbose
         self.steps = 0
         self.dontlearn_enabled = True
-        self.position_history = []
+        self.position_history = deque()
+        # Nombre de passages par case de l'historique, tenu à jour
+        self.heatmap = Counter()
         self.current_position = (0, 0)
         self.history_length = 3
         self.board_size = (0, 0)
@@ -43,6 +77,11 @@ class QLearningAgent:
         self.locked_x = 0
         self.locked_y = 0
         self.mini_size = (7, 7)
+        self._neighbours_size = None
+        self._neighbours_table = []
+        self._flood_key = None
+        self._flood = None
+        self._free_space = {}
 
     def dontlearn(self):
         """
@@ -53,24 +92,23 @@ class QLearningAgent:
         self.exploration_rate = 1.0
 
     def update_position(self, action, state):
-        """Met à jour la position actuelle en fonction de l'action choisie."""
+        """
+        Met à jour la position actuelle en fonction de l'action choisie
+        (indice dans core.ACTIONS).
+        """
+        dx, dy = DELTAS[action]
         x, y = self.current_position
-        if action == "UP":
-            x -= 1
-        elif action == "DOWN":
-            x += 1
-        elif action == "LEFT":
-            y -= 1
-        elif action == "RIGHT":
-            y += 1
+        x += dx
+        y += dy
 
         # Enregistrer la nouvelle position dans l'historique
         self.current_position = (x, y)
         self.position_history.append(self.current_position)
+        self.heatmap[self.current_position] += 1
 
         # Garder uniquement les `history_length` dernières positions
         if len(self.position_history) > self.history_length:
-            self.position_history.pop(0)
+            self._evict_position()
 
         # Détecter les murs et déduire la taille du plateau
         self.detect_board(state)
@@ -79,8 +117,7 @@ class QLearningAgent:
 
     def detect_walls(self, state):
         """Détecte les murs et déduit la taille du plateau."""
-        objects = ast.literal_eval(state)
-        obj_up, _, obj_left, _ = objects[:4]
+        obj_up, _, obj_left, _ = decode_state(state)
 
         # Récupérer les récompenses avec une valeur par défaut
         reward_up = self.discovered_objects.get(obj_up, 0)
@@ -113,8 +150,7 @@ class QLearningAgent:
         if self.wall_obj is None:
             return
 
-        objects = ast.literal_eval(state)
-        obj_up, obj_down, obj_left, obj_right = objects[:4]
+        obj_up, obj_down, obj_left, obj_right = decode_state(state)
 
         # Détecter les murs en haut
         if obj_up == self.wall_obj:
@@ -178,8 +214,7 @@ class QLearningAgent:
             return
 
         max_x, max_y = self.board_size
-        objects = ast.literal_eval(state)
-        obj_up, obj_down, obj_left, obj_right = objects[:4]
+        obj_up, obj_down, obj_left, obj_right = decode_state(state)
 
         # Vérification et ajustement de `current_position`
         new_x, new_y = (
@@ -216,20 +251,28 @@ class QLearningAgent:
             new_y - self.current_position[1],
         )
 
-        if dx != 0 or dy != 0:
-            # Appliquer le décalage unique à tout l'historique du spectre
-            self.position_history = [
-                (x + dx, y + dy) for x, y in self.position_history
-            ]
-
         # Mise à jour finale de `current_position`
         self.current_position = (new_x, new_y)
 
-        # Assurer que tout reste dans les limites
-        self.position_history = [
-            (max(0, min(x, max_x - 1)), max(0, min(y, max_y - 1)))
-            for x, y in self.position_history
-        ]
+        # Appliquer le décalage unique à tout l'historique du spectre, en
+        # s'assurant que tout reste dans les limites ; la carte de chaleur
+        # n'est reconstruite que si l'historique change
+        if (
+            dx != 0
+            or dy != 0
+            or any(
+                not (0 <= x < max_x and 0 <= y < max_y)
+                for x, y in self.heatmap
+            )
+        ):
+            self.position_history = deque(
+                (
+                    max(0, min(x + dx, max_x - 1)),
+                    max(0, min(y + dy, max_y - 1)),
+                )
+                for x, y in self.position_history
+            )
+            self.heatmap = Counter(self.position_history)
         self.current_position = (
             max(0, min(self.current_position[0], max_x - 1)),
             max(0, min(self.current_position[1], max_y - 1)),
@@ -244,46 +287,104 @@ class QLearningAgent:
         elif reward < -1:
             # Diminuer la longueur de l'historique en cas de pénalité
             self.history_length = max(0, self.history_length - 1)
-            del self.position_history[0]
+            if self.position_history:
+                self._evict_position()
+
+    def _evict_position(self):
+        """Retire la plus ancienne position de l'historique et de la carte."""
+        position = self.position_history.popleft()
+        if self.heatmap[position] > 1:
+            self.heatmap[position] -= 1
+        else:
+            del self.heatmap[position]
 
     def reset_history(self):
-        """Réinitialise l'historique des positions et sa longueur."""
-        self.position_history = []
+        """
+        Réinitialise l'historique des positions et sa longueur, et termine
+        la trajectoire en cours de la règle d'apprentissage.
+        """
+        if self.dontlearn_enabled:
+            self.learner.end_episode(self)
+        self.position_history.clear()
+        self.heatmap.clear()
         self.history_length = (
             3  # Réinitialiser la longueur de l'historique à 3
         )
         self.wall_up = False
         self.wall_left = False
 
-    def learn(self, state, action, reward, next_state):
+    def learn(self, state, action_index, reward, next_state, done=False):
+        """
+        Apprend une transition ; `done` signale qu'elle termine la partie.
+        La mise à jour de la Q-table est confiée à `self.learner`.
+        """
         if not self.dontlearn_enabled:
             return
-        obj = ast.literal_eval(state)[self.actions.index(action)]
+        obj = decode_state(state)[action_index]
         self.discovered_objects[obj] = max(
             self.discovered_objects.get(obj, float("-inf")), reward
         )
-        q_values = self.q_table.setdefault(
-            state, {action: 0 for action in self.actions}
-        )
-        next_q_values = self.q_table.get(
-            next_state, {action: 0 for action in self.actions}
-        )
-        best_next_action = max(next_q_values, key=next_q_values.get)
-        td_target = (
-            reward + self.discount_factor * next_q_values[best_next_action]
-        )
-        td_error = td_target - q_values[action]
-        q_values[action] += (
-            self.learning_rate * td_error * (1 - self.exploration_rate)
+        self.learner.update(
+            self, state, action_index, reward, next_state, done
         )
 
         self.adjust_history_length(reward)
 
-    def handle_new_objects(self, state, action, reward):
+    def learn_batch(self, states, actions, rewards, next_states):
+        """
+        Apprend un lot de transitions (indices d'actions) en un seul appel
+        vectorisé sur la Q-table, par exemple celles d'un BatchBoard.
+        Toujours en TD à un pas : `self.learner` n'est pas utilisé.
+        """
+        if not self.dontlearn_enabled:
+            return
+        states = np.asarray(states, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=np.float32)
+        objects = (states >> (actions * CELL_BITS)) & CELL_MASK
+        best = np.full(len(CELLS), -np.inf)
+        np.maximum.at(best, objects, rewards)
+        for code in np.flatnonzero(best > -np.inf):
+            obj = CELLS[code]
+            self.discovered_objects[obj] = max(
+                self.discovered_objects.get(obj, float("-inf")),
+                int(best[code]),
+            )
+        self.q_table.batch_update(
+            states,
+            actions,
+            rewards,
+            next_states,
+            self.discount_factor,
+            self.learning_rate * (1 - self.exploration_rate),
+        )
+
+    def replay_batch(
+        self, states, actions, rewards, next_states, dones=None, weights=None
+    ):
+        """
+        Réapprend un mini-lot tiré d'une mémoire de rejeu (voir replay.py)
+        en un seul appel vectorisé sur la Q-table. Les objets sont déjà
+        connus : seule la Q-table change. Retourne les erreurs TD.
+        """
+        if not self.dontlearn_enabled:
+            return None
+        return self.q_table.batch_update(
+            states,
+            actions,
+            rewards,
+            next_states,
+            self.discount_factor,
+            self.learning_rate * (1 - self.exploration_rate),
+            dones,
+            weights,
+        )
+
+    def handle_new_objects(self, state, action_index, reward):
         if not self.dontlearn_enabled:
             return  # Ne rien faire en mode Dontlearn
 
-        obj = ast.literal_eval(state)[self.actions.index(action)]
+        obj = decode_state(state)[action_index]
         previous_reward = self.discovered_objects.get(obj, "Inconnu")
 
         # Ajouter ou mettre à jour l'objet dans discovered_objects
@@ -297,52 +398,108 @@ class QLearningAgent:
                 print(f"Objet {obj} {text}, Nouvelle récompense = {reward}")
 
     def save_model(self, filepath):
+        """
+        Sauvegarde le modèle en JSON, ou au format binaire (voir
+        model_format) si le chemin se termine par .bin. Un simple nom de
+        fichier est enregistré dans le dossier 'models'.
+        """
+        binary = filepath.endswith(BINARY_EXTENSION)
         # S'assurer que le chemin est correct
-        if not filepath.endswith(".json"):
+        if not binary and not filepath.endswith(".json"):
             filepath += ".json"
 
-        # S'assurer que le dossier 'models' existe
-        models_dir = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "models"
-        )
-        os.makedirs(models_dir, exist_ok=True)
-
-        # Construire le chemin complet du fichier
-        save_path = os.path.join(models_dir, os.path.basename(filepath))
-
-        with open(save_path, "w") as f:
-            json.dump(
-                {
-                    "q_table": self.q_table,
-                    "discovered_objects": self.discovered_objects,
-                    "wall_obj": self.wall_obj,
-                    "board_size": self.board_size,
-                    "score_rate": self.score_rate,
-                    "heatmap_rate": self.heatmap_rate,
-                    "learning_rate": self.learning_rate,
-                    "discount_factor": self.discount_factor,
-                    "exploration_rate": self.exploration_rate,
-                    "exploration_decay": self.exploration_decay,
-                },
-                f,
+        if os.path.dirname(filepath):
+            save_path = filepath
+        else:
+            # S'assurer que le dossier 'models' existe
+            models_dir = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), "models"
+            )
+            save_path = os.path.join(models_dir, filepath)
+
+        # Fichier temporaire puis renommage : le modèle chargé depuis ce
+        # même chemin (un memmap) n'est jamais tronqué pendant l'écriture
+        if binary:
+            atomic_write(save_path, self.write_binary)
+        else:
+            atomic_write(
+                save_path,
+                lambda f: json.dump(self.get_model(), f),
+                binary=False,
             )
+        return save_path
+
+    def write_binary(self, fileobj, extra=None):
+        """
+        Écrit le modèle au format binaire dans un fichier ouvert ; `extra`
+        ajoute des champs à l'en-tête (par exemple la session).
+        """
+        header = self.get_model(with_q_table=False)
+        header["actions"] = list(self.actions)
+        header.update(extra or {})
+        states, q_values = self.q_table.to_arrays()
+        write_binary_model(fileobj, header, states, q_values)
 
     def load_model(self, filepath):
-        with open(filepath, "r") as f:
-            data = json.load(f)
-            self.q_table = data.get("q_table", {})
-            self.discovered_objects = data.get("discovered_objects", {})
-            self.wall_obj = data.get("wall_obj", "")  # Charger l'objet mur
-            self.board_size = (
-                data.get("board_size", (0, 0))[0],
-                data.get("board_size", (0, 0))[1],
-            )  # Charger la taille du plateau
-            self.score_rate = float(data.get("score_rate", ""))
-            self.heatmap_rate = float(data.get("heatmap_rate", ""))
-            self.learning_rate = float(data.get("learning_rate", ""))
-            self.discount_factor = float(data.get("discount_factor", ""))
-            self.exploration_rate = float(data.get("exploration_rate", ""))
-            self.exploration_decay = float(data.get("exploration_decay", ""))
+        """Charge un modèle JSON ou binaire, format détecté automatiquement."""
+        if is_binary_model(filepath):
+            header, states, q_values = read_binary_model(filepath)
+            if header.get("actions", self.actions) != list(self.actions):
+                raise ValueError(
+                    f"Actions du modèle incompatibles : {header['actions']}"
+                )
+            self.set_model(header)
+            # Les backends copient les Q-values : le memmap peut être fermé
+            self.q_table.load_arrays(states, q_values)
+        else:
+            with open(filepath, "r") as f:
+                self.set_model(json.load(f))
+
+    def get_model(self, with_q_table=True):
+        """Modèle complet (Q-table et paramètres), sérialisable en JSON."""
+        model = {}
+        if with_q_table:
+            model["q_table"] = {
+                state_key(state): dict(
+                    zip(self.actions, map(float, q_values))
+                )
+                for state, q_values in self.q_table.items()
+            }
+        model["discovered_objects"] = self.discovered_objects
+        model["wall_obj"] = self.wall_obj
+        model["board_size"] = self.board_size
+        model["score_rate"] = self.score_rate
+        model["heatmap_rate"] = self.heatmap_rate
+        model["learning_rate"] = self.learning_rate
+        model["discount_factor"] = self.discount_factor
+        model["exploration_rate"] = self.exploration_rate
+        model["exploration_decay"] = self.exploration_decay
+        model["q_temperature"] = self.q_temperature
+        return model
+
+    def set_model(self, data):
+        """Charge un modèle au format de get_model."""
+        # Les clés texte sont converties une seule fois au chargement
+        self.q_table.clear()
+        for key, q_values in data.get("q_table", {}).items():
+            self.q_table.set_row(
+                parse_state_key(key),
+                [q_values.get(action, 0) for action in self.actions],
+            )
+        self.discovered_objects = data.get("discovered_objects", {})
+        self.wall_obj = data.get("wall_obj", "")  # Charger l'objet mur
+        self.board_size = (
+            data.get("board_size", (0, 0))[0],
+            data.get("board_size", (0, 0))[1],
+        )  # Charger la taille du plateau
+        self.score_rate = float(data.get("score_rate", ""))
+        self.heatmap_rate = float(data.get("heatmap_rate", ""))
+        self.learning_rate = float(data.get("learning_rate", ""))
+        self.discount_factor = float(data.get("discount_factor", ""))
+        self.exploration_rate = float(data.get("exploration_rate", ""))
+        self.exploration_decay = float(data.get("exploration_decay", ""))
+        # Modèles plus anciens : tirage à la température par défaut
+        self.q_temperature = float(data.get("q_temperature", 1.0))
 
     def decay_exploration(self):
         """Diminue progressivement l'exploration pour éviter l'overfitting"""
@@ -352,77 +509,146 @@ class QLearningAgent:
         )
 
     def get_q_values(self, state):
-        return self.q_table.get(state, {action: 0 for action in self.actions})
+        """Q-values d'un état sous forme {action: valeur}, pour l'affichage."""
+        return dict(zip(self.actions, self.q_table.values(state)))
 
     def get_position_history(self):
         """Retourne l'historique des positions du serpent."""
         return self.position_history
 
+    def _neighbours(self, rows, cols):
+        """Voisins (UP, DOWN, LEFT, RIGHT) de chaque case, par indice plat."""
+        if self._neighbours_size != (rows, cols):
+            neighbours = []
+            for x in range(rows):
+                for y in range(cols):
+                    cell = []
+                    if x > 0:
+                        cell.append((x - 1) * cols + y)
+                    if x < rows - 1:
+                        cell.append((x + 1) * cols + y)
+                    if y > 0:
+                        cell.append(x * cols + y - 1)
+                    if y < cols - 1:
+                        cell.append(x * cols + y + 1)
+                    neighbours.append(tuple(cell))
+            self._neighbours_table = neighbours
+            self._neighbours_size = (rows, cols)
+        return self._neighbours_table
+
+    def _flood_fill(self):
+        """
+        Étiquette une seule fois les zones libres du plateau déduit (cases
+        hors de l'historique des positions). Le résultat est mémorisé pour
+        la taille du plateau et l'ensemble des cases bloquées, et partagé
+        par les quatre coups évalués dans choose_action.
+        Retourne (étiquettes par case, -1 si bloquée ; tailles des zones).
+        """
+        rows, cols = self.board_size
+        blocked = frozenset(
+            x * cols + y
+            for x, y in self.heatmap
+            if 0 <= x < rows and 0 <= y < cols
+        )
+        key = (rows, cols, blocked)
+        if self._flood_key == key:
+            return self._flood
+        neighbours = self._neighbours(rows, cols)
+        labels = [0] * (rows * cols)
+        for cell in blocked:
+            labels[cell] = -1
+        sizes = [0]
+        for start, label in enumerate(labels):
+            if label:
+                continue
+            label = len(sizes)
+            labels[start] = label
+            queue = deque([start])
+            size = 0
+            while queue:
+                cell = queue.popleft()
+                size += 1
+                for neighbour in neighbours[cell]:
+                    if not labels[neighbour]:
+                        labels[neighbour] = label
+                        queue.append(neighbour)
+            sizes.append(size)
+        self._flood_key = key
+        self._flood = (labels, sizes)
+        self._free_space = {}
+        return self._flood
+
     def compute_free_space(self, position):
         """Calcule l'espace libre autour d'une position donnée."""
-        queue = [position]
-        visited = set(queue)
-        count = 0
-
-        while queue:
-            x, y = queue.pop(0)
-            count += 1
-            for dx, dy in [
-                (-1, 0),
-                (1, 0),
-                (0, -1),
-                (0, 1),
-            ]:  # UP, DOWN, LEFT, RIGHT
-                new_pos = (x + dx, y + dy)
-                if (
-                    0 <= new_pos[0] < self.board_size[0]
-                    and 0 <= new_pos[1] < self.board_size[1]
-                    and new_pos not in visited
-                    and new_pos not in self.position_history
-                    and new_pos != self.wall_obj  # Évite le mur
-                ):
-                    queue.append(new_pos)
-                    visited.add(new_pos)
-
+        labels, sizes = self._flood_fill()
+        if position in self._free_space:
+            return self._free_space[position]
+        rows, cols = self.board_size
+        x, y = position
+        inside = 0 <= x < rows and 0 <= y < cols
+        if inside and labels[x * cols + y] > 0:
+            count = sizes[labels[x * cols + y]]
+        else:
+            # Case bloquée ou hors plateau : elle compte pour une, plus les
+            # zones libres distinctes qui la bordent
+            zones = set()
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < rows and 0 <= ny < cols:
+                    label = labels[nx * cols + ny]
+                    if label > 0:
+                        zones.add(label)
+            count = 1 + sum(sizes[label] for label in zones)
+        self._free_space[position] = count
         return count
 
     def compute_heatmap(self):
-        """Crée une carte de chaleur indiquant les zones les plus visitées"""
-        heatmap = {}
-        for pos in self.position_history:
-            heatmap[pos] = (
-                heatmap.get(pos, 0) + 1
-            )  # Plus un endroit est visité, plus il est chaud
-        return heatmap
+        """
+        Carte de chaleur indiquant les zones les plus visitées : plus un
+        endroit est visité, plus il est chaud. Elle est tenue à jour à chaque
+        ajout ou retrait dans l'historique, sans recalcul.
+        """
+        return self.heatmap
+
+    def choose_actions(self, states):
+        """
+        Choix epsilon-greedy vectorisé sur la Q-table pour un lot d'états
+        (un par partie d'un BatchBoard). Retourne des indices d'actions.
+        """
+        nb_states = len(states)
+        if not self.dontlearn_enabled:
+            return self.np_rng.integers(0, len(self.actions), nb_states)
+        actions = np.asarray(
+            self.q_table.best_actions(states), dtype=np.int64
+        )
+        explore = self.np_rng.random(nb_states) < self.exploration_rate
+        actions[explore] = self.np_rng.integers(
+            0, len(self.actions), int(explore.sum())
+        )
+        return actions
 
     def choose_action(self, state, training=True):
+        """Choisit une action et retourne son indice dans core.ACTIONS."""
         if not self.dontlearn_enabled:
-            return random.choice(self.actions)
+            return self.rng.randrange(len(self.actions))
 
-        objects = ast.literal_eval(state)
+        objects = decode_state(state)
         unknown_objects = [
             obj for obj in objects if obj not in self.discovered_objects
         ]
 
         if unknown_objects:
-            chosen_object = random.choice(unknown_objects)
-            action_index = objects.index(chosen_object)
-            action = self.actions[action_index]
+            chosen_object = self.rng.choice(unknown_objects)
+            action = objects.index(chosen_object)
         else:
             heatmap = self.compute_heatmap()
             best_actions = []
-            action_scores = {}
+            action_scores = []
+            position_x, position_y = self.current_position
 
             for i, obj in enumerate(objects):
-                x, y = self.current_position
-                if self.actions[i] == "UP":
-                    x -= 1
-                elif self.actions[i] == "DOWN":
-                    x += 1
-                elif self.actions[i] == "LEFT":
-                    y -= 1
-                elif self.actions[i] == "RIGHT":
-                    y += 1
+                dx, dy = DELTAS[i]
+                x = position_x + dx
+                y = position_y + dy
 
                 # Évaluer l'action selon la récompense et l'espace libre
                 reward = self.discovered_objects.get(obj, 0)
@@ -440,17 +666,29 @@ class QLearningAgent:
                 ):  # Si l'espace libre est trop faible, pénaliser l'action
                     score -= 50
 
-                action_scores[self.actions[i]] = score
+                action_scores.append(score)
 
             # Sélectionner les actions avec le score maximal
-            max_score = max(action_scores.values())
+            max_score = max(action_scores)
             best_actions = [
                 action
-                for action, score in action_scores.items()
+                for action, score in enumerate(action_scores)
                 if score == max_score
             ]
 
-            action = random.choice(best_actions)
+            if len(best_actions) == 1:
+                action = best_actions[0]
+            else:
+                # Égalité : tirage pondéré par les Q-values de la règle
+                # d'apprentissage (Boltzmann), qui reste aléatoire pour ne
+                # pas enfermer le serpent dans une boucle
+                q_values = self.q_table.values(state)
+                best_q = max(q_values[action] for action in best_actions)
+                weights = [
+                    math.exp((q_values[action] - best_q) / self.q_temperature)
+                    for action in best_actions
+                ]
+                action = self.rng.choices(best_actions, weights)[0]
 
         self.update_position(action, state)
         return action
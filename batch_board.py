@@ -0,0 +1,198 @@
+# batch_board.py
+import numpy as np
+from core import (
+    ATE_GREEN,
+    ATE_RED,
+    BOARD_FULL,
+    DELTAS,
+    END_RESULTS,
+    GAME_OVER,
+    HIT_BODY,
+    MOVED,
+    RESULT_NAMES,
+    REWARDS,
+)
+from state import CELL_BITS, EMPTY, GREEN, RED, SNAKE, WALL
+
+# Tables de core.py sous forme de tableaux indexables par lot
+DX = np.array([dx for dx, _ in DELTAS], dtype=np.int64)
+DY = np.array([dy for _, dy in DELTAS], dtype=np.int64)
+REWARD_TABLE = np.array(REWARDS, dtype=np.float32)
+# Vrai pour les codes de résultat qui terminent une partie
+END_TABLE = np.isin(np.arange(len(RESULT_NAMES)), END_RESULTS)
+
+
+class BatchBoard:
+    """
+    N parties de Snake indépendantes stockées dans des tableaux NumPy
+    empilés et avancées toutes ensemble par un seul appel à `step`.
+    Les règles sont celles de Board.update ; les parties terminées sont
+    relancées automatiquement.
+    """
+
+    def __init__(self, n, size=10, nb_r_app=1, nb_g_app=2, seed=None):
+        self.n = n
+        self.size = size
+        self.nb_r_app = nb_r_app
+        self.nb_g_app = nb_g_app
+        self.rng = np.random.default_rng(seed)
+        cap = size * size
+        self.cells = np.zeros((n, cap), dtype=np.uint8)
+        # Corps du serpent : tampon circulaire d'indices de cases par partie,
+        # la tête dans la case `head`, la queue `length - 1` cases avant
+        self.body = np.zeros((n, cap), dtype=np.int64)
+        self.head = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.max_length = np.zeros(n, dtype=np.int64)
+        self.results = np.zeros(n, dtype=np.int64)
+        # Longueur max, nombre de pas et score des parties terminées au
+        # dernier pas
+        self.episode_lengths = np.zeros(n, dtype=np.int64)
+        self.episode_steps = np.zeros(n, dtype=np.int64)
+        self.episode_scores = np.zeros(n, dtype=np.int64)
+        self._ids = np.arange(n)
+        self.reset()
+
+    def reset(self, games=None):
+        """Relance les parties `games` (toutes par défaut)."""
+        games = self._ids if games is None else np.asarray(games)
+        if not len(games):
+            return
+        size = self.size
+        self.cells[games] = EMPTY
+        start_x = self.rng.integers(1, size - 1, len(games))
+        start_y = self.rng.integers(1, size - 3, len(games))
+        # Cases 0..2 du tampon : queue (y + 2), milieu, tête (y)
+        for slot in range(3):
+            self.body[games, slot] = start_x * size + start_y + 2 - slot
+        self.head[games] = 2
+        self.length[games] = 3
+        self.cells[games[:, None], self.body[games, :3]] = SNAKE
+        self.score[games] = 0
+        self.steps[games] = 0
+        self.max_length[games] = 3
+        for _ in range(self.nb_g_app):
+            self._spawn(games, GREEN)
+        for _ in range(self.nb_r_app):
+            self._spawn(games, RED)
+        self.states = self.get_states()
+
+    def _spawn(self, games, code, attempts=8):
+        """
+        Pose un objet sur une case libre de chaque partie de `games`.
+        Retourne le masque des parties où le plateau est plein.
+        """
+        full = np.zeros(len(games), dtype=bool)
+        pending = np.arange(len(games))
+        cap = self.size * self.size
+        for _ in range(attempts):
+            if not len(pending):
+                return full
+            cells = self.rng.integers(0, cap, len(pending))
+            free = self.cells[games[pending], cells] == EMPTY
+            self.cells[games[pending[free]], cells[free]] = code
+            pending = pending[~free]
+        # Plateaux presque pleins : tirage exact parmi les cases libres
+        for k in pending:
+            free_cells = np.flatnonzero(self.cells[games[k]] == EMPTY)
+            if len(free_cells):
+                self.cells[games[k], self.rng.choice(free_cells)] = code
+            else:
+                full[k] = True
+        return full
+
+    def get_states(self):
+        """États encodés (voir state.encode_state) de toutes les parties."""
+        size = self.size
+        head_x, head_y = np.divmod(self.body[self._ids, self.head], size)
+        states = np.zeros(self.n, dtype=np.int64)
+        for action in range(4):
+            x = head_x + DX[action]
+            y = head_y + DY[action]
+            inside = (x >= 0) & (x < size) & (y >= 0) & (y < size)
+            index = np.where(inside, x * size + y, 0)
+            code = np.where(inside, self.cells[self._ids, index], WALL)
+            states |= code.astype(np.int64) << (action * CELL_BITS)
+        return states
+
+    def step(self, actions):
+        """
+        Avance toutes les parties d'un pas.
+
+        Retourne (next_states, rewards, dones) : les états juste après le
+        pas (avant la relance des parties terminées), les récompenses et les
+        parties terminées. Les états à jouer ensuite sont dans `self.states`
+        et les résultats détaillés dans `self.results`.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        size = self.size
+        cap = size * size
+        ids = self._ids
+        head_x, head_y = np.divmod(self.body[ids, self.head], size)
+        x = head_x + DX[actions]
+        y = head_y + DY[actions]
+        inside = (x >= 0) & (x < size) & (y >= 0) & (y < size)
+        new_index = np.where(inside, x * size + y, 0)
+        cell = np.where(inside, self.cells[ids, new_index], WALL)
+
+        results = self.results
+        results[:] = MOVED
+        results[cell == WALL] = GAME_OVER
+        results[cell == SNAKE] = HIT_BODY
+
+        # Déplacement simple : la queue libère sa case, la tête avance
+        moved = np.flatnonzero(cell == EMPTY)
+        tail_slot = (self.head[moved] - self.length[moved] + 1) % cap
+        self.cells[moved, self.body[moved, tail_slot]] = EMPTY
+        self.head[moved] = (self.head[moved] + 1) % cap
+        self.body[moved, self.head[moved]] = new_index[moved]
+        self.cells[moved, new_index[moved]] = SNAKE
+        self.score[moved] -= 1
+
+        # Pomme verte : la tête avance sans libérer la queue
+        green = np.flatnonzero(cell == GREEN)
+        if len(green):
+            self.head[green] = (self.head[green] + 1) % cap
+            self.body[green, self.head[green]] = new_index[green]
+            self.cells[green, new_index[green]] = SNAKE
+            self.length[green] += 1
+            self.score[green] += 20
+            self.max_length[green] = np.maximum(
+                self.max_length[green], self.length[green]
+            )
+            results[green] = ATE_GREEN
+            results[green[self._spawn(green, GREEN)]] = BOARD_FULL
+
+        # Pomme rouge : la queue disparaît, la tête ne bouge pas
+        red = np.flatnonzero(cell == RED)
+        if len(red):
+            tail_slot = (self.head[red] - self.length[red] + 1) % cap
+            self.cells[red, self.body[red, tail_slot]] = EMPTY
+            self.length[red] -= 1
+            results[red] = ATE_RED
+            dead = self.length[red] == 0
+            results[red[dead]] = GAME_OVER
+            red = red[~dead]
+            self.cells[red, new_index[red]] = EMPTY
+            self._spawn(red, RED)
+            self.score[red] -= 10
+
+        dones = END_TABLE[results]
+        self.steps[~dones] += 1
+        rewards = REWARD_TABLE[results]
+        next_states = self.get_states()
+
+        finished = np.flatnonzero(dones)
+        self.episode_lengths[:] = 0
+        self.episode_steps[:] = 0
+        self.episode_scores[:] = 0
+        self.episode_lengths[finished] = self.max_length[finished]
+        self.episode_steps[finished] = self.steps[finished] + 1
+        self.episode_scores[finished] = self.score[finished]
+        if len(finished):
+            self.reset(finished)
+        else:
+            self.states = next_states
+        return next_states, rewards, dones
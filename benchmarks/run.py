@@ -0,0 +1,344 @@
+# benchmarks/run.py
+"""
+Mesure le débit (opérations par seconde) des chemins chauds de
+l'entraînement et le compare à une référence enregistrée.
+
+Depuis la racine du dépôt :
+    python -m benchmarks.run                     # mesure + comparaison
+    python -m benchmarks.run -update             # réécrit la référence
+    python -m benchmarks.run -sizes 10 15 -seconds 0.2 -out results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+from agent import QLearningAgent
+from batch_board import BatchBoard
+from board import Board
+from cli import COMMAND_LINE
+from core import ACTIONS, DELTAS, END_RESULTS, REWARDS
+
+BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+SIZES = (10, 15, 30, 50)
+APPLES = ((2, 1), (10, 5))
+
+
+def seeded():
+    """Générateur à graine fixe : chaque mesure rejoue les mêmes parties."""
+    return random.Random(0)
+
+
+def trained_agent(size):
+    """Agent qui connaît déjà les objets et le plateau : pas de hasard pur."""
+    agent = QLearningAgent(actions=ACTIONS, rng=seeded())
+    agent.discovered_objects = {
+        "0": -1,
+        "W": -100,
+        "S": -50,
+        "G": 20,
+        "R": -10,
+    }
+    agent.wall_obj = "W"
+    agent.board_size = (size, size)
+    return agent
+
+
+def bench_board_update(size, green, red, seconds):
+    rng = seeded()
+    board = Board(size=size, nb_g_app=green, nb_r_app=red, rng=rng)
+    ops = 0
+    elapsed = 0.0
+    while elapsed < seconds:
+        start = time.perf_counter()
+        for _ in range(1000):
+            board.snake_dir = rng.choice(DELTAS)
+            if board.update() in END_RESULTS:
+                board.reset()
+        elapsed += time.perf_counter() - start
+        ops += 1000
+    return ops, elapsed
+
+
+def bench_board_get_state(size, green, red, seconds):
+    board = Board(size=size, nb_g_app=green, nb_r_app=red, rng=seeded())
+    ops = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(1000):
+            board.get_state()
+        ops += 1000
+    return ops, time.perf_counter() - start
+
+
+def bench_agent(size, green, red, seconds):
+    """Boucle d'entraînement, chronométrée séparément par phase de l'agent."""
+    board = Board(size=size, nb_g_app=green, nb_r_app=red, rng=seeded())
+    agent = trained_agent(size)
+    ops = 0
+    choose_time = 0.0
+    learn_time = 0.0
+    clock = time.perf_counter
+    while choose_time + learn_time < seconds:
+        state = board.get_state()
+        start = clock()
+        action = agent.choose_action(state)
+        choose_time += clock() - start
+        board.snake_dir = DELTAS[action]
+        result = board.update()
+        next_state = board.get_state()
+        start = clock()
+        done = result in END_RESULTS
+        agent.learn(state, action, REWARDS[result], next_state, done)
+        learn_time += clock() - start
+        ops += 1
+        if done:
+            board.reset()
+            agent.reset_history()
+    return {
+        "QLearningAgent.choose_action": (ops, choose_time),
+        "QLearningAgent.learn": (ops, learn_time),
+    }
+
+
+def bench_sessions(size, green, red, seconds, max_steps=500):
+    rng = seeded()
+    board = Board(size=size, nb_g_app=green, nb_r_app=red, rng=rng)
+    agent = QLearningAgent(actions=ACTIONS, rng=rng)
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        steps += COMMAND_LINE.play_session(board, agent, max_steps=max_steps)
+    return steps, time.perf_counter() - start
+
+
+def bench_greedy_board(size, green, red, seconds):
+    """
+    Politique et apprentissage de -batch (epsilon-greedy sur la Q-table,
+    TD à un pas) joués partie par partie sur un Board : la référence
+    équitable de bench_greedy_batch.
+    """
+    rng = seeded()
+    board = Board(size=size, nb_g_app=green, nb_r_app=red, rng=rng)
+    agent = QLearningAgent(actions=ACTIONS, rng=rng)
+    q_table = agent.q_table
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(1000):
+            state = board.get_state()
+            if rng.random() < agent.exploration_rate:
+                action = rng.randrange(4)
+            else:
+                action = q_table.best_action(state)
+            board.snake_dir = DELTAS[action]
+            result = board.update()
+            done = result in END_RESULTS
+            # Un serpent mangé par une pomme rouge n'a plus de tête
+            next_state = state if done else board.get_state()
+            agent.learner.update(
+                agent, state, action, REWARDS[result], next_state, done
+            )
+            agent.decay_exploration()
+            if done:
+                board.reset()
+        steps += 1000
+    return steps, time.perf_counter() - start
+
+
+def bench_greedy_batch(size, green, red, seconds, games=256):
+    """Même politique que bench_greedy_board, sur un BatchBoard."""
+    boards = BatchBoard(
+        games, size=size, nb_g_app=green, nb_r_app=red, seed=0
+    )
+    agent = QLearningAgent(actions=ACTIONS, qtable="array", rng=seeded())
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        states = boards.states
+        actions = agent.choose_actions(states)
+        next_states, rewards, _ = boards.step(actions)
+        agent.learn_batch(states, actions, rewards, next_states)
+        agent.decay_exploration()
+        steps += games
+    return steps, time.perf_counter() - start
+
+
+def bench_batch_board(size, green, red, seconds, games=256):
+    boards = BatchBoard(
+        games, size=size, nb_g_app=green, nb_r_app=red, seed=0
+    )
+    rng = np.random.default_rng(0)
+    ops = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        boards.step(rng.integers(0, 4, games))
+        ops += games
+    return ops, time.perf_counter() - start
+
+
+def run(sizes, apples, seconds):
+    results = []
+
+    def record(bench, size, green, red, ops, elapsed):
+        results.append(
+            {
+                "bench": bench,
+                "size": size,
+                "green": green,
+                "red": red,
+                "ops": ops,
+                "seconds": round(elapsed, 4),
+                "ops_per_s": round(ops / max(elapsed, 1e-9), 1),
+            }
+        )
+        print(
+            f"{bench:<30} size={size:<3} G={green:<3} R={red:<3}"
+            f" {results[-1]['ops_per_s']:>14,.0f} ops/s"
+        )
+
+    for size in sizes:
+        for green, red in apples:
+            if green + red + 3 > size * size:
+                continue
+            record(
+                "Board.update",
+                size,
+                green,
+                red,
+                *bench_board_update(size, green, red, seconds),
+            )
+            record(
+                "Board.get_state",
+                size,
+                green,
+                red,
+                *bench_board_get_state(size, green, red, seconds),
+            )
+            phases = bench_agent(size, green, red, seconds)
+            for bench, (ops, elapsed) in phases.items():
+                record(bench, size, green, red, ops, elapsed)
+            record(
+                "headless session steps",
+                size,
+                green,
+                red,
+                *bench_sessions(size, green, red, seconds),
+            )
+            record(
+                "BatchBoard.step transitions",
+                size,
+                green,
+                red,
+                *bench_batch_board(size, green, red, seconds),
+            )
+            record(
+                "greedy steps Board",
+                size,
+                green,
+                red,
+                *bench_greedy_board(size, green, red, seconds),
+            )
+            record(
+                "greedy steps BatchBoard",
+                size,
+                green,
+                red,
+                *bench_greedy_batch(size, green, red, seconds),
+            )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Liste les mesures plus lentes que la référence au-delà de la marge."""
+    reference = {
+        (r["bench"], r["size"], r["green"], r["red"]): r["ops_per_s"]
+        for r in baseline["results"]
+    }
+    regressions = []
+    for result in results:
+        key = (result["bench"], result["size"], result["green"], result["red"])
+        if key not in reference:
+            continue
+        ratio = result["ops_per_s"] / max(reference[key], 1e-9)
+        result["baseline_ratio"] = round(ratio, 3)
+        if ratio < 1 - tolerance:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput benchmarks for Board, agent and training loop."
+    )
+    parser.add_argument(
+        "-sizes", type=int, nargs="+", default=list(SIZES), help="Board sizes"
+    )
+    parser.add_argument(
+        "-seconds",
+        type=float,
+        default=0.5,
+        help="Measuring time per benchmark and configuration",
+    )
+    parser.add_argument("-out", type=str, help="Write the JSON results here")
+    parser.add_argument(
+        "-baseline",
+        type=str,
+        default=BASELINE,
+        help="Baseline JSON results to compare against",
+    )
+    parser.add_argument(
+        "-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown before a result counts as a regression",
+    )
+    parser.add_argument(
+        "-update", action="store_true", help="Overwrite the baseline"
+    )
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seconds": args.seconds,
+        },
+        "results": run(args.sizes, APPLES, args.seconds),
+    }
+
+    status = 0
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nRéférence mise à jour : {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(
+                report["results"], json.load(f), args.tolerance
+            )
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) sur la référence :")
+            for (bench, size, green, red), ratio in regressions:
+                print(
+                    f"  {bench} size={size} G={green} R={red} : x{ratio:.2f}"
+                )
+            status = 1
+        else:
+            print("\nAucune régression par rapport à la référence.")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,23 @@
 # board.py
 import random
+from collections import deque
+from core import (
+    ATE_GREEN,
+    ATE_RED,
+    BOARD_FULL,
+    GAME_OVER,
+    HIT_BODY,
+    MOVED,
+)
+from state import (
+    CELL_BITS,
+    CELLS,
+    EMPTY,
+    GREEN,
+    RED,
+    SNAKE,
+    WALL,
+)
 
 
 class Board:
@@ -9,9 +27,21 @@ class Board:
         initial_score=0,
         nb_r_app=1,
         nb_g_app=2,
+        rng=None,
     ):
         self.size = size
+        # Générateur propre au plateau (random.Random) : aucun état caché
+        # partagé avec le reste du programme. Il peut être partagé avec
+        # l'agent pour qu'une seule graine fixe toute la partie.
+        self.rng = rng if rng is not None else random.Random()
         self.grid = [["0" for _ in range(size)] for _ in range(size)]
+        # Grille d'occupation à plat (codes de state.CELLS), tenue à jour
+        # à chaque déplacement : toutes les requêtes par pas sont en O(1)
+        self.cells = bytearray(size * size)
+        # Index des cases libres : tableau à retrait par échange et position
+        # de chaque case dans ce tableau (-1 si la case est occupée)
+        self.free = list(range(size * size))
+        self.free_pos = list(range(size * size))
         self.snake = self.initialize_snake()
         self.green_apples = []
         self.nb_g_app = nb_g_app
@@ -26,15 +56,18 @@ class Board:
         self.max_length_reached = 3
 
     def initialize_snake(self):
-        start_x = random.randint(1, self.size - 2)
-        start_y = random.randint(1, self.size - 4)
-        return [(start_x, start_y + i) for i in range(3)]
+        start_x = self.rng.randint(1, self.size - 2)
+        start_y = self.rng.randint(1, self.size - 4)
+        snake = deque((start_x, start_y + i) for i in range(3))
+        for x, y in snake:
+            self._set_cell(x * self.size + y, SNAKE)
+        return snake
 
     def random_or_advantageous_direction(self):
         directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
         advantages = {d: self.evaluate_direction(d) for d in directions}
         if all(value == 0 for value in advantages.values()):
-            return random.choice(directions)
+            return self.rng.choice(directions)
         return max(advantages, key=advantages.get)
 
     def evaluate_direction(self, direction):
@@ -44,110 +77,182 @@ class Board:
 
         if not (0 <= new_head[0] < self.size and 0 <= new_head[1] < self.size):
             return -100  # Mur
-        if new_head in self.snake:
+        cell = self.cells[new_head[0] * self.size + new_head[1]]
+        if cell == SNAKE:
             return -50  # Corps du serpent
-        if new_head in self.green_apples:
+        if cell == GREEN:
             return +20  # Pomme verte
-        if new_head == self.red_apples:
+        if cell == RED:
             return -10  # Pomme rouge
         return 0  # Case vide
 
-    def reset(self):
+    def reset(self, seed=None):
+        """
+        Relance une partie. Avec `seed`, le générateur est d'abord
+        réinitialisé : la même graine redonne la même partie (placement
+        initial, pommes, et choix de l'agent s'il partage ce générateur).
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+        self.cells[:] = bytes(len(self.cells))
+        self.free = list(range(len(self.cells)))
+        self.free_pos = list(range(len(self.cells)))
+        self.green_apples = []
+        self.red_apples = []
         self.snake = self.initialize_snake()
         self.snake_dir = self.random_or_advantageous_direction()
         self.score = self.initial_score
         self.steps = 0
         self.max_length = 3
-        self.green_apples = []
         self.nb_g_app = self.nb_g_app
-        self.red_apples = []
         self.nb_r_app = self.nb_r_app
         self.place_apples()
 
+    def set_layout(self, snake, green_apples, red_apples):
+        """
+        Remplace la partie par une disposition donnée (cases (x, y) du
+        serpent, tête en premier, et des pommes), par exemple celle d'un
+        épisode enregistré (voir recorder.py).
+        """
+        self.cells[:] = bytes(len(self.cells))
+        self.free = list(range(len(self.cells)))
+        self.free_pos = list(range(len(self.cells)))
+        self.snake = deque(snake)
+        for x, y in self.snake:
+            self._set_cell(x * self.size + y, SNAKE)
+        self.green_apples = list(green_apples)
+        for x, y in self.green_apples:
+            self._set_cell(x * self.size + y, GREEN)
+        self.red_apples = list(red_apples)
+        for x, y in self.red_apples:
+            self._set_cell(x * self.size + y, RED)
+        self.score = self.initial_score
+        self.steps = 0
+        self.max_length = len(self.snake)
+
     def place_apples(self):
-        self.green_apples = [
-            self.random_empty_cell() for _ in range(self.nb_g_app)
-        ]
-        self.red_apples = [
-            self.random_empty_cell() for _ in range(self.nb_r_app)
-        ]
+        for x, y in self.green_apples + self.red_apples:
+            self._set_cell(x * self.size + y, EMPTY)
+        self.green_apples = []
+        for _ in range(self.nb_g_app):
+            self.place_object(GREEN, self.green_apples)
+        self.red_apples = []
+        for _ in range(self.nb_r_app):
+            self.place_object(RED, self.red_apples)
+
+    def place_object(self, code, objects):
+        """
+        Pose un objet sur une case vide aléatoire et l'ajoute à `objects`.
+        Retourne False si le plateau est plein.
+        """
+        cell = self.random_empty_cell()
+        if cell is None:
+            return False
+        self._set_cell(cell[0] * self.size + cell[1], code)
+        objects.append(cell)
+        return True
 
     def random_empty_cell(self):
-        while True:
-            x, y = random.randint(0, self.size - 1), random.randint(
-                0, self.size - 1
-            )
-            if (
-                (x, y) not in self.snake
-                and (x, y) not in self.green_apples
-                and (x, y) not in self.red_apples
-            ):
-                return x, y
+        """Case libre tirée uniformément en O(1), None si plus aucune."""
+        if not self.free:
+            return None
+        index = self.free[self.rng.randrange(len(self.free))]
+        return divmod(index, self.size)
+
+    def _set_cell(self, index, code):
+        """Écrit une case et tient à jour l'index des cases libres."""
+        was_free = self.cells[index] == EMPTY
+        self.cells[index] = code
+        if code == EMPTY:
+            if not was_free:
+                self.free_pos[index] = len(self.free)
+                self.free.append(index)
+        elif was_free:
+            pos = self.free_pos[index]
+            last = self.free.pop()
+            if last != index:
+                self.free[pos] = last
+                self.free_pos[last] = pos
+            self.free_pos[index] = -1
 
     def update(self):
+        """
+        Avance le serpent d'une case dans `snake_dir` et retourne le code
+        du résultat (voir core.RESULT_NAMES).
+        """
         head_x, head_y = self.snake[0]
         dx, dy = self.snake_dir
         new_head = (head_x + dx, head_y + dy)
 
-        if new_head in self.snake:
-            return "Hit Snake Body"
-
         if not (0 <= new_head[0] < self.size and 0 <= new_head[1] < self.size):
-            return "Game Over"
+            return GAME_OVER
+
+        index = new_head[0] * self.size + new_head[1]
+        cell = self.cells[index]
+        if cell == SNAKE:
+            return HIT_BODY
 
-        if new_head in self.green_apples:
-            self.snake.insert(0, new_head)
+        if cell == GREEN:
+            self.snake.appendleft(new_head)
+            self._set_cell(index, SNAKE)
             self.green_apples.remove(new_head)
-            self.green_apples.append(self.random_empty_cell())
             self.score += 20
             self.max_length = max(self.max_length, len(self.snake))
             self.max_length_reached = max(
                 self.max_length_reached, len(self.snake)
             )
-            return "Ate Green Apple"
-        elif new_head in self.red_apples:
-            self.snake.pop()
+            if not self.place_object(GREEN, self.green_apples):
+                # Plus aucune case libre : le serpent a rempli le plateau
+                return BOARD_FULL
+            return ATE_GREEN
+        elif cell == RED:
+            tail_x, tail_y = self.snake.pop()
+            self._set_cell(tail_x * self.size + tail_y, EMPTY)
             if len(self.snake) == 0:
-                return "Game Over"
+                return GAME_OVER
+            self._set_cell(index, EMPTY)
             self.red_apples.remove(new_head)
-            self.red_apples.append(self.random_empty_cell())
+            self.place_object(RED, self.red_apples)
             self.score -= 10
-            return "Ate Red Apple"
+            return ATE_RED
         else:
-            self.snake.insert(0, new_head)
-            self.snake.pop()
+            self.snake.appendleft(new_head)
+            self._set_cell(index, SNAKE)
+            tail_x, tail_y = self.snake.pop()
+            self._set_cell(tail_x * self.size + tail_y, EMPTY)
             self.score -= 1
-            return "Moved"
+            return MOVED
 
     def render(self):
-        self.grid = [["0" for _ in range(self.size)] for _ in range(self.size)]
-        for gx, gy in self.green_apples:
-            self.grid[gx][gy] = "G"
-        for rx, ry in self.red_apples:
-            self.grid[rx][ry] = "R"
-        for i, (x, y) in enumerate(self.snake):
-            self.grid[x][y] = "H" if i == 0 else "S"
+        size = self.size
+        self.grid = [
+            [CELLS[code] for code in self.cells[x * size: (x + 1) * size]]
+            for x in range(size)
+        ]
+        head_x, head_y = self.snake[0]
+        self.grid[head_x][head_y] = "H"
         for row in self.grid:
             print(" ".join(row))
         print()
 
     def get_state(self):
+        """
+        Retourne l'état encodé (voir state.encode_state) des quatre
+        cases voisines de la tête : UP, DOWN, LEFT, RIGHT.
+        """
         head_x, head_y = self.snake[0]
-        state = (
-            self.cell_info(head_x - 1, head_y),
-            self.cell_info(head_x + 1, head_y),
-            self.cell_info(head_x, head_y - 1),
-            self.cell_info(head_x, head_y + 1),
+        return (
+            self.cell_code(head_x - 1, head_y)
+            | self.cell_code(head_x + 1, head_y) << CELL_BITS
+            | self.cell_code(head_x, head_y - 1) << (2 * CELL_BITS)
+            | self.cell_code(head_x, head_y + 1) << (3 * CELL_BITS)
         )
-        return state
 
-    def cell_info(self, x, y):
+    def cell_code(self, x, y):
+        """Code (voir state.CELLS) de la case (x, y), WALL hors plateau."""
         if not (0 <= x < self.size and 0 <= y < self.size):
-            return "W"
-        if (x, y) in self.snake:
-            return "S"
-        if (x, y) in self.green_apples:
-            return "G"
-        if (x, y) in self.red_apples:
-            return "R"
-        return "0"
+            return WALL
+        return self.cells[x * self.size + y]
+
+    def cell_info(self, x, y):
+        return CELLS[self.cell_code(x, y)]
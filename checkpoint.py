@@ -0,0 +1,213 @@
+# checkpoint.py
+import json
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+from model_format import read_binary_model
+
+# Journal des deltas : suite d'enregistrements ajoutés en fin de fichier
+#   en-tête fixe : DELTA_MAGIC, session, taille JSON, lignes, actions
+#   JSON         : exploration_rate, objets découverts, mur, plateau
+#   états        : uint32[lignes] ; Q-values : float32[lignes, actions]
+# Un enregistrement incomplet en fin de journal (crash) est ignoré, puis
+# coupé à la reprise pour que les deltas suivants restent lisibles.
+DELTA_MAGIC = b"L2SD"
+DELTA_SUFFIX = ".delta"
+_RECORD = struct.Struct("<4sQIII")
+
+
+def atomic_write(path, write, binary=True):
+    """
+    Écrit un fichier via un fichier temporaire du même dossier puis
+    os.replace : le fichier est soit l'ancien, soit le nouveau, jamais
+    un fichier à moitié écrit.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(path), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb" if binary else "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Checkpointer:
+    """
+    Points de reprise périodiques d'un entraînement : toutes les `every`
+    sessions et/ou `seconds` secondes. Chaque point est un modèle binaire
+    complet écrit atomiquement, ou, avec `deltas`, un enregistrement des
+    seules lignes de Q-table modifiées ajouté au journal `path.delta`
+    (un point complet est réécrit tous les `full_every` deltas).
+    """
+
+    def __init__(
+        self, path, every=0, seconds=0, deltas=False, full_every=20
+    ):
+        if not path.endswith(".bin"):
+            path += ".bin"
+        self.path = path
+        self.delta_path = path + DELTA_SUFFIX
+        self.every = every
+        self.seconds = seconds
+        self.deltas = deltas
+        self.full_every = full_every
+        self._last_time = time.monotonic()
+        self._last_session = 0
+        self._nb_deltas = 0
+        self._saved_rows = None
+
+    def step(self, agent, session):
+        """Appelé à la fin de chaque session : sauvegarde si c'est l'heure."""
+        due = self.every > 0 and session - self._last_session >= self.every
+        if self.seconds > 0:
+            due = due or time.monotonic() - self._last_time >= self.seconds
+        if due:
+            self.save(agent, session)
+        return due
+
+    def save(self, agent, session, full=False):
+        if (
+            self.deltas
+            and not full
+            and self._saved_rows is not None
+            and self._nb_deltas < self.full_every
+        ):
+            self._append_delta(agent, session)
+            self._nb_deltas += 1
+        else:
+            atomic_write(
+                self.path,
+                lambda f: agent.write_binary(f, extra={"session": session}),
+            )
+            # Les deltas sont inclus dans le nouveau point complet
+            if os.path.exists(self.delta_path):
+                os.remove(self.delta_path)
+            self._nb_deltas = 0
+        if self.deltas:
+            self._saved_rows = self._rows(agent)
+        self._last_session = session
+        self._last_time = time.monotonic()
+
+    @staticmethod
+    def _rows(agent):
+        states, q_values = agent.q_table.to_arrays()
+        return {
+            state: row.tobytes()
+            for state, row in zip(states.tolist(), q_values)
+        }
+
+    def _append_delta(self, agent, session):
+        states, q_values = agent.q_table.to_arrays()
+        changed = [
+            i
+            for i, state in enumerate(states.tolist())
+            if self._saved_rows.get(state) != q_values[i].tobytes()
+        ]
+        meta = json.dumps(
+            {
+                "exploration_rate": agent.exploration_rate,
+                "discovered_objects": agent.discovered_objects,
+                "wall_obj": agent.wall_obj,
+                "board_size": agent.board_size,
+            }
+        ).encode("utf-8")
+        rows = np.ascontiguousarray(q_values[changed], dtype="<f4")
+        with open(self.delta_path, "ab") as f:
+            f.write(
+                _RECORD.pack(
+                    DELTA_MAGIC,
+                    session,
+                    len(meta),
+                    len(changed),
+                    rows.shape[1],
+                )
+            )
+            f.write(meta)
+            f.write(states[changed].astype("<u4").tobytes())
+            f.write(rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def resume(self, agent):
+        """
+        Recharge le dernier point de reprise (point complet puis deltas)
+        dans l'agent. Retourne le numéro de la dernière session sauvegardée,
+        0 s'il n'y a aucun point de reprise. Un enregistrement incomplet en
+        fin de journal est coupé : les deltas ajoutés ensuite le suivent
+        directement.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        header, states, q_values = read_binary_model(self.path)
+        agent.set_model(header)
+        # Copie en mémoire : le fichier sera remplacé au prochain point
+        agent.q_table.load_arrays(np.array(states), np.array(q_values))
+        session = header.get("session", 0)
+        valid_size = 0
+        for record_session, meta, states, rows, end in self._read_deltas():
+            valid_size = end
+            # Deltas antérieurs au point complet (crash pendant la rotation)
+            if record_session <= session:
+                continue
+            for state, row in zip(states.tolist(), rows):
+                agent.q_table.set_row(state, row)
+            agent.exploration_rate = meta["exploration_rate"]
+            agent.discovered_objects = meta["discovered_objects"]
+            agent.wall_obj = meta["wall_obj"]
+            agent.board_size = tuple(meta["board_size"])
+            session = record_session
+            self._nb_deltas += 1
+        if (
+            os.path.exists(self.delta_path)
+            and os.path.getsize(self.delta_path) > valid_size
+        ):
+            os.truncate(self.delta_path, valid_size)
+        if self.deltas:
+            self._saved_rows = self._rows(agent)
+        self._last_session = session
+        return session
+
+    def _read_deltas(self):
+        """
+        Enregistrements complets du journal : (session, JSON, états,
+        lignes, position de fin dans le fichier).
+        """
+        if not os.path.exists(self.delta_path):
+            return
+        with open(self.delta_path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + _RECORD.size <= len(data):
+            magic, session, meta_size, nb_rows, nb_actions = _RECORD.unpack(
+                data[offset: offset + _RECORD.size]
+            )
+            end = offset + _RECORD.size + meta_size + nb_rows * 4 * (
+                1 + nb_actions
+            )
+            if magic != DELTA_MAGIC or end > len(data):
+                return
+            start = offset + _RECORD.size
+            meta = json.loads(data[start: start + meta_size])
+            start += meta_size
+            states = np.frombuffer(
+                data, dtype="<u4", count=nb_rows, offset=start
+            )
+            rows = np.frombuffer(
+                data,
+                dtype="<f4",
+                count=nb_rows * nb_actions,
+                offset=start + 4 * nb_rows,
+            ).reshape(nb_rows, nb_actions)
+            yield session, meta, states, rows, end
+            offset = end
@@ -1,12 +1,343 @@
 # gui.py
 
-import os
+import random
 import time
+import numpy as np
 from board import Board
+from policy import CompiledPolicy
+from recorder import read_episodes
+from batch_board import BatchBoard
 from agent import QLearningAgent
+from core import ACTIONS, DELTAS, END_RESULTS, RESULT_NAMES, REWARDS
+from metrics import HISTORY_WINDOW, RollingStats
+from state import decode_state
+from terminal import TerminalRenderer
 
 
 class COMMAND_LINE:
+    @staticmethod
+    def play_session(
+        board,
+        agent,
+        dontlearn=None,
+        max_steps=None,
+        replay=None,
+        recorder=None,
+    ):
+        """
+        Joue une session complète sans aucun affichage et retourne
+        le nombre de pas effectués. `max_steps` arrête la session
+        au bout de ce nombre de pas. Les transitions jouées sont aussi
+        confiées à `replay` (un ReplayBuffer) pour être rejouées, et la
+        partie à `recorder` (un EpisodeRecorder) pour être enregistrée.
+        """
+        if recorder is None:
+            board.reset()
+        else:
+            recorder.reset(board)
+        agent.reset_history()
+        board.steps = 0
+        while True:
+            state = board.get_state()
+            action = agent.choose_action(state, training=not dontlearn)
+            board.snake_dir = DELTAS[action]
+            result = board.update()
+            reward = REWARDS[result]
+            done = result in END_RESULTS
+            if recorder is not None:
+                recorder.step(board, action, result)
+
+            if not dontlearn:
+                next_state = board.get_state()
+                agent.learn(state, action, reward, next_state, done)
+                if replay is not None:
+                    replay.step(agent, state, action, reward, next_state, done)
+                agent.decay_exploration()
+
+            if done:
+                if recorder is not None:
+                    recorder.end()
+                return board.steps + 1
+            board.steps += 1
+            if max_steps is not None and board.steps >= max_steps:
+                if recorder is not None:
+                    recorder.end()
+                return board.steps
+
+    @staticmethod
+    def batch_sessions(
+        agent,
+        sessions,
+        batch,
+        board_size=10,
+        nb_r_app=1,
+        nb_g_app=2,
+        dontlearn=None,
+        replay=None,
+        profiler=None,
+        seed=None,
+        max_steps=None,
+    ):
+        """
+        Joue `sessions` sessions sur un BatchBoard de `batch` parties
+        avancées ensemble, et produit (steps, max_length, score) pour
+        chaque session terminée. `max_steps` arrête (et relance) une
+        partie au bout de ce nombre de pas, comme run_session.
+        """
+        boards = BatchBoard(
+            batch,
+            size=board_size,
+            nb_r_app=nb_r_app,
+            nb_g_app=nb_g_app,
+            seed=seed,
+        )
+        if profiler:
+            profiler.instrument(boards, "step")
+            profiler.instrument(agent, "choose_actions", "learn_batch")
+            if replay is not None:
+                profiler.instrument(replay, "step_batch")
+        finished = 0
+        while finished < sessions:
+            states = boards.states
+            actions = agent.choose_actions(states)
+            next_states, rewards, dones = boards.step(actions)
+            if not dontlearn:
+                agent.learn_batch(states, actions, rewards, next_states)
+                if replay is not None:
+                    replay.step_batch(
+                        agent, states, actions, rewards, next_states, dones
+                    )
+                agent.decay_exploration()
+            for game in np.flatnonzero(dones)[: sessions - finished]:
+                finished += 1
+                yield (
+                    int(boards.episode_steps[game]),
+                    int(boards.episode_lengths[game]),
+                    int(boards.episode_scores[game]),
+                )
+            if max_steps is not None:
+                stopped = np.flatnonzero(boards.steps >= max_steps)
+                for game in stopped[: sessions - finished]:
+                    finished += 1
+                    yield (
+                        int(boards.steps[game]),
+                        int(boards.max_length[game]),
+                        int(boards.score[game]),
+                    )
+                boards.reset(stopped)
+
+    @staticmethod
+    def run_headless_mode(
+        sessions,
+        save_model=None,
+        load_model=None,
+        dontlearn=None,
+        board_size=10,
+        nb_r_app=1,
+        nb_g_app=2,
+        report_every=100,
+        qtable="dict",
+        batch=0,
+        checkpoint=None,
+        resume=False,
+        learner=None,
+        replay=None,
+        profiler=None,
+        compiled=False,
+        max_steps=None,
+        seed=None,
+        recorder=None,
+        metrics=None,
+        q_temperature=None,
+    ):
+        """
+        Entraînement sans rendu : aucune sortie par pas, aucune pause,
+        seulement une ligne de progression agrégée toutes les
+        `report_every` sessions. Avec `batch` > 0, les sessions sont jouées
+        par lots sur un BatchBoard avec un choix epsilon-greedy vectorisé.
+        `checkpoint` (un Checkpointer) sauvegarde périodiquement le modèle,
+        et `resume` reprend depuis son dernier point. `learner` remplace la
+        règle d'apprentissage à un pas (voir learners.py), et `replay` (un
+        ReplayBuffer) rejoue des mini-lots de transitions passées.
+        `profiler` (voir profiler.py) chronomètre chaque phase du pas.
+        Avec `compiled`, le modèle chargé est seulement évalué, sans
+        apprentissage, par sa politique compilée (voir policy.py), qui
+        joue les coups de l'agent. `max_steps` arrête
+        une session au bout de ce nombre de pas. `seed` rend l'exécution
+        reproductible : le plateau et l'agent partagent un générateur.
+        `recorder` (un EpisodeRecorder) enregistre chaque session, et
+        `metrics` (un MetricsSink) en écrit les métriques. `q_temperature`
+        remplace la température du tirage entre coups à égalité (celle du
+        modèle par défaut).
+        """
+        rng = random.Random(seed)
+        agent = QLearningAgent(
+            actions=ACTIONS, qtable=qtable, learner=learner, rng=rng
+        )
+
+        if load_model:
+            agent.load_model(load_model)
+            print(f"Modèle chargé depuis : {load_model}")
+            mode = "Game"
+        else:
+            mode = "Learning"
+
+        if dontlearn:
+            agent.dontlearn()
+
+        first_session = 1
+        if checkpoint and resume:
+            first_session = checkpoint.resume(agent) + 1
+            print(
+                f"Reprise depuis {checkpoint.path} : session {first_session}"
+            )
+        if q_temperature is not None:
+            agent.q_temperature = q_temperature
+        remaining = max(0, sessions - first_session + 1)
+
+        if compiled:
+            policy = CompiledPolicy.from_agent(agent)
+            mode = "Compiled"
+            dontlearn = True
+
+        report_every = max(1, report_every)
+        print(f"Mode : {mode} (headless) | Sessions : {sessions}")
+
+        start = time.perf_counter()
+        window_start = start
+        window_steps = 0
+        window_lengths = 0
+        window_max = 0
+        window_count = 0
+        total_steps = 0
+        best_length = 0
+
+        if compiled:
+            board = Board(
+                size=board_size,
+                nb_r_app=nb_r_app,
+                nb_g_app=nb_g_app,
+                rng=rng,
+            )
+            if profiler:
+                profiler.instrument(board, "update", "get_state")
+                profiler.instrument(policy, "choose_action")
+            episodes = (
+                (
+                    policy.play(board, max_steps, recorder=recorder)[0],
+                    board.max_length,
+                    board.score,
+                )
+                for _ in range(remaining)
+            )
+        elif batch > 0:
+            episodes = COMMAND_LINE.batch_sessions(
+                agent,
+                remaining,
+                batch,
+                board_size=board_size,
+                nb_r_app=nb_r_app,
+                nb_g_app=nb_g_app,
+                dontlearn=dontlearn,
+                replay=replay,
+                profiler=profiler,
+                seed=seed,
+                max_steps=max_steps,
+            )
+        else:
+            board = Board(
+                size=board_size,
+                nb_r_app=nb_r_app,
+                nb_g_app=nb_g_app,
+                rng=rng,
+            )
+            if profiler:
+                profiler.instrument_step(board, agent)
+                if replay is not None:
+                    profiler.instrument(replay, "step")
+            episodes = (
+                (
+                    COMMAND_LINE.play_session(
+                        board, agent, dontlearn, max_steps, replay, recorder
+                    ),
+                    board.max_length,
+                    board.score,
+                )
+                for _ in range(remaining)
+            )
+
+        for session, (steps, length, score) in enumerate(
+            episodes, first_session
+        ):
+            window_count += 1
+            total_steps += steps
+            window_steps += steps
+            window_lengths += length
+            window_max = max(window_max, length)
+            best_length = max(best_length, length)
+            if metrics is not None:
+                metrics.record(
+                    session,
+                    length,
+                    steps,
+                    score,
+                    agent.exploration_rate,
+                    len(agent.q_table),
+                )
+
+            if checkpoint and not dontlearn:
+                checkpoint.step(agent, session)
+
+            if session % report_every == 0 or session == sessions:
+                now = time.perf_counter()
+                elapsed = max(now - window_start, 1e-9)
+                print(
+                    f"Session {session}/{sessions}"
+                    f" | {window_count / elapsed:.1f} sessions/s"
+                    f" | {window_steps / elapsed:.0f} steps/s"
+                    f" | Mean Length : {window_lengths / window_count:.2f}"
+                    f" | Max Length : {window_max}"
+                    f" | Exploration : {agent.exploration_rate:.4f}"
+                )
+                window_start = now
+                window_steps = 0
+                window_lengths = 0
+                window_max = 0
+                window_count = 0
+
+        if checkpoint and not dontlearn and remaining:
+            checkpoint.save(agent, sessions, full=True)
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(
+            f"\nTerminé : {remaining} sessions, {total_steps} steps en"
+            f" {elapsed:.2f}s ({total_steps / elapsed:.0f} steps/s)"
+            f" | Meilleure longueur : {best_length}"
+        )
+        if profiler:
+            profiler.dump()
+
+        if recorder is not None:
+            recorder.close()
+            print(
+                f"{recorder.episodes} épisodes enregistrés dans :"
+                f" {recorder.path}"
+            )
+
+        if metrics is not None:
+            metrics.close()
+            print(
+                f"{metrics.records} sessions de métriques écrites dans :"
+                f" {metrics.path}"
+            )
+
+        if save_model:
+            if dontlearn:
+                print("\nMode Dontlearn activé. Aucun modèle sauvegardé.")
+            else:
+                agent.save_model(save_model)
+                print(f"\nModèle sauvegardé dans : {save_model}")
+
     @staticmethod
     def run_command_line_mode(
         sessions,
@@ -17,15 +348,41 @@ class COMMAND_LINE:
         board_size=10,
         nb_r_app=1,
         nb_g_app=2,
+        qtable="dict",
+        checkpoint=None,
+        resume=False,
+        learner=None,
+        replay=None,
+        profiler=None,
+        frame_interval=0.0,
+        seed=None,
+        recorder=None,
+        metrics=None,
+        q_temperature=None,
     ):
-
+        """
+        Entraînement affiché dans le terminal : le plateau, les Q-values
+        et les objets découverts sont redessinés après chaque pas par un
+        TerminalRenderer, au plus une image toutes les `frame_interval`
+        secondes (la dernière image d'une session est toujours dessinée).
+        `seed` fixe le générateur partagé par le plateau et l'agent,
+        `recorder` (un EpisodeRecorder) enregistre chaque session et
+        `metrics` (un MetricsSink) en écrit les métriques. Seules les
+        HISTORY_WINDOW dernières longueurs restent en mémoire.
+        `q_temperature` remplace la température du modèle.
+        """
+        rng = random.Random(seed)
         board = Board(
             size=board_size,
             nb_r_app=nb_r_app,
             nb_g_app=nb_g_app,
+            rng=rng,
         )
-        agent = QLearningAgent(actions=["UP", "DOWN", "LEFT", "RIGHT"])
-        length_history = []  # Initialiser l'historique des longueurs
+        agent = QLearningAgent(
+            actions=ACTIONS, qtable=qtable, learner=learner, rng=rng
+        )
+        # Historique borné des longueurs et agrégats de toutes les sessions
+        length_history = RollingStats(HISTORY_WINDOW)
 
         if load_model:
             agent.load_model(load_model)
@@ -37,56 +394,43 @@ class COMMAND_LINE:
         if dontlearn:
             agent.dontlearn()
 
-        # Initialisation : Effacer l'écran
-        os.system("cls" if os.name == "nt" else "clear")
+        first_session = 1
+        if checkpoint and resume:
+            first_session = checkpoint.resume(agent) + 1
+        if q_temperature is not None:
+            agent.q_temperature = q_temperature
 
-        def clear_screen():
-            os.system("cls" if os.name == "nt" else "clear")
+        renderer = TerminalRenderer(frame_interval=frame_interval)
 
-        def display_session_info(session, steps, max_length, score):
-            print(f"Mode : {mode} | Session : {session}/{sessions}")
+        def session_info(session, steps, max_length, score):
             text = f"Steps : {steps} | Max Length :"
-            print(f"{text} {max_length} | Score : {score}\n")
-
-        def display_board():
-            print("Carte actuelle :")
-            print("w " * (board.size + 2))
-            for i in range(board.size):
-                row = ["w"]
-                for j in range(board.size):
-                    if (i, j) in board.snake:
-                        row.append("H" if (i, j) == board.snake[0] else "S")
-                    elif (i, j) in board.green_apples:
-                        row.append("G")
-                    elif (i, j) in board.red_apples:
-                        row.append("R")
-                    else:
-                        row.append("0")
-                row.append("w")
-                print(" ".join(row))
-            print("w " * (board.size + 2))
-
-        def display_q_values(state):
-            print("\nQ-values pour l'état actuel:")
-            q_values = agent.get_q_values(str(state))
-            directions = ["UP", "DOWN", "LEFT", "RIGHT"]
-            state_mapping = {
-                "UP": state[0],
-                "DOWN": state[1],
-                "LEFT": state[2],
-                "RIGHT": state[3],
-            }
-            for action in directions:
-                print(
-                    f"  {action:<7} => {state_mapping[action]}",
-                    f" : {q_values[action]:.2f}",
+            return [
+                f"Mode : {mode} | Session : {session}/{sessions}",
+                f"{text} {max_length} | Score : {score}",
+                "",
+            ]
+
+        def q_values_lines(state):
+            lines = ["", "Q-values pour l'état actuel:"]
+            q_values = agent.get_q_values(state)
+            objects = decode_state(state)
+            for action, obj in zip(ACTIONS, objects):
+                lines.append(
+                    f"  {action:<7} => {obj}  : {q_values[action]:.2f}"
                 )
+            return lines
 
-        def display_objects_discovered():
+        def objects_discovered_lines():
             discovered = agent.discovered_objects
-            print(f"\nObjets découverts :\nboard_size: {agent.board_size}")
+            lines = [
+                "",
+                "Objets découverts :",
+                f"board_size: {agent.board_size}",
+            ]
             if dontlearn:
-                print("  Mode Dontlearn activé. Ne gère pas les objets.")
+                lines.append(
+                    "  Mode Dontlearn activé. Ne gère pas les objets."
+                )
             elif discovered:
                 # Convertir les objets découverts en liste (objet, récompense)
                 items = list(discovered.items())
@@ -103,76 +447,104 @@ class COMMAND_LINE:
                         if isinstance(obj, str)
                         and isinstance(reward, (int, float))
                     )
-                    print(formatted_line)
+                    lines.append(formatted_line)
             else:
-                print("  Aucun objet découvert pour l'instant.")
+                lines.append("  Aucun objet découvert pour l'instant.")
+            return lines
 
-        def display_length_history(length_history):
+        def display_length_history(length_history, last=10):
+            # Seulement les `last` dernières sessions et le résumé : le
+            # coût d'affichage ne croît pas avec le nombre de sessions
             print("\nLength History:")
-            for i in range(0, len(length_history), 2):
-                line = length_history[i: i + 2]
-                formatted_line = " | ".join(
-                    f"Length session {i + j + 1:4} ==> {length:3}"
-                    for j, length in enumerate(line)
+            recent = list(length_history.recent)[-last:]
+            for i in range(0, len(recent), 2):
+                print(
+                    " | ".join(
+                        f"Length session {session:4} ==> {length:3}"
+                        for session, length in recent[i: i + 2]
+                    )
                 )
-                print(formatted_line)
-
-        length_history = []  # Initialiser l'historique des longueurs
+            print(length_history.summary())
 
-        for session in range(1, sessions + 1):
-            board.reset()
-            agent.reset_history()
-            board.steps = 0
-            print(f"Session {session}/{sessions} en cours...")
-            while True:
-                clear_screen()
-                display_session_info(
+        def display_frame(state, action):
+            renderer.draw(
+                session_info(
                     session,
                     board.steps,
                     board.max_length_reached,
                     board.max_length,
-                )
-                display_board()
+                ),
+                board,
+                q_values_lines(state)
+                + ["", f"Action choisie : {ACTIONS[action]}"]
+                + objects_discovered_lines(),
+            )
+
+        if profiler:
+            profiler.instrument_step(board, agent)
+            if replay is not None:
+                profiler.instrument(replay, "step")
+            display_frame = profiler.timed("render", display_frame)
 
+        for session in range(first_session, sessions + 1):
+            if recorder is None:
+                board.reset()
+            else:
+                recorder.reset(board)
+            agent.reset_history()
+            board.steps = 0
+            # Une image complète par session, puis seulement les différences
+            renderer.invalidate()
+            while True:
                 # Choisir une action et mettre à jour l'état
                 state = board.get_state()
-                action = agent.choose_action(
-                    str(state), training=not dontlearn
-                )
-                board.snake_dir = {
-                    "UP": (-1, 0),
-                    "DOWN": (1, 0),
-                    "LEFT": (0, -1),
-                    "RIGHT": (0, 1),
-                }[action]
+                action = agent.choose_action(state, training=not dontlearn)
+                board.snake_dir = DELTAS[action]
                 result = board.update()
 
                 # Récompenser l'agent
-                reward = {
-                    "Ate Green Apple": 20,
-                    "Ate Red Apple": -10,
-                    "Hit Snake Body": -50,
-                    "Game Over": -100,
-                }.get(result, -1)
+                reward = REWARDS[result]
+                done = result in END_RESULTS
+                if recorder is not None:
+                    recorder.step(board, action, result)
 
                 if not dontlearn:
                     next_state = board.get_state()
-                    agent.learn(str(state), action, reward, str(next_state))
+                    agent.learn(state, action, reward, next_state, done)
+                    if replay is not None:
+                        replay.step(
+                            agent, state, action, reward, next_state, done
+                        )
                     agent.decay_exploration()
 
-                # Afficher les Q-values et objets découverts
-                display_q_values(state)
-                print(f"\nAction choisie : {action}")
-                display_objects_discovered()
+                # Afficher le plateau, les Q-values et objets découverts ;
+                # la dernière image d'une session n'est jamais sautée
+                if done or renderer.due():
+                    display_frame(state, action)
 
-                if result == "Game Over" or result == "Hit Snake Body":
-                    length_history.append(board.max_length)
+                if done:
+                    if recorder is not None:
+                        recorder.end()
+                    length_history.add(
+                        session, board.max_length, board.steps + 1
+                    )
+                    if metrics is not None:
+                        metrics.record(
+                            session,
+                            board.max_length,
+                            board.steps + 1,
+                            board.score,
+                            agent.exploration_rate,
+                            len(agent.q_table),
+                        )
                     print(
                         f"\nGame Over!   ==> {session} Session terminée avec",
                         f"un score: {board.max_length}\n",
                         end="",
                     )
                     display_length_history(length_history)
+                    if checkpoint and not dontlearn:
+                        checkpoint.step(agent, session)
                     if session != sessions:
                         time.sleep(2)
                         # time.sleep(0.5)
@@ -181,9 +553,64 @@ class COMMAND_LINE:
                 else:
                     board.steps += 1
 
+        if checkpoint and not dontlearn and first_session <= sessions:
+            checkpoint.save(agent, sessions, full=True)
+
+        if profiler:
+            profiler.dump()
+
+        if recorder is not None:
+            recorder.close()
+            print(
+                f"{recorder.episodes} épisodes enregistrés dans :"
+                f" {recorder.path}"
+            )
+
+        if metrics is not None:
+            metrics.close()
+            print(
+                f"{metrics.records} sessions de métriques écrites dans :"
+                f" {metrics.path}"
+            )
+
         if save_model:
             if dontlearn:
                 print("\nMode Dontlearn activé. Aucun modèle sauvegardé.")
             else:
                 agent.save_model(save_model)
                 print(f"\nModèle sauvegardé dans : {save_model}")
+
+    @staticmethod
+    def run_watch_mode(path, indices=None, frame_interval=0.1):
+        """
+        Rejoue dans le terminal les épisodes enregistrés dans `path` (tous,
+        ou ceux de `indices`), un pas toutes les `frame_interval` secondes.
+        """
+        renderer = TerminalRenderer()
+        watched = 0
+        for episode in read_episodes(path, indices):
+            watched += 1
+            seed = "aucune" if episode.seed is None else episode.seed
+            renderer.invalidate()
+            length = len(episode.snake)
+            for board, action, result in episode.replay():
+                length = board.max_length
+                renderer.draw(
+                    [
+                        f"Relecture : {path} | Épisode : {episode.index}",
+                        f"Steps : {board.steps + 1}/{len(episode)}"
+                        f" | Max Length : {board.max_length}"
+                        f" | Graine : {seed}",
+                        "",
+                    ],
+                    board,
+                    [
+                        "",
+                        f"Action : {ACTIONS[action]}",
+                        f"Résultat : {RESULT_NAMES[result]}",
+                    ],
+                )
+                time.sleep(frame_interval)
+            print(f"\nFin de l'épisode {episode.index} : longueur {length}")
+        if not watched:
+            print(f"Aucun épisode à rejouer dans : {path}")
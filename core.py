@@ -0,0 +1,28 @@
+# core.py
+# Tables partagées par le plateau, l'agent et les interfaces : calculées une
+# seule fois ici plutôt que reconstruites à chaque pas de jeu.
+
+# Actions, dans l'ordre des voisins de l'état (voir state.py)
+ACTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+UP, DOWN, LEFT, RIGHT = range(4)
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+# Déplacement (dx, dy) de la tête pour chaque action
+DELTAS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Résultats de Board.update (et BatchBoard.step)
+MOVED, ATE_GREEN, ATE_RED, HIT_BODY, GAME_OVER, BOARD_FULL = range(6)
+RESULT_NAMES = (
+    "Moved",
+    "Ate Green Apple",
+    "Ate Red Apple",
+    "Hit Snake Body",
+    "Game Over",
+    "Board Full",
+)
+
+# Récompense de chaque résultat
+REWARDS = (-1, 20, -10, -50, -100, 20)
+
+# Résultats qui terminent une session
+END_RESULTS = (HIT_BODY, GAME_OVER, BOARD_FULL)
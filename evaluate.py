@@ -0,0 +1,331 @@
+# evaluate.py
+"""
+Évalue un ou plusieurs modèles sauvegardés sur un grand nombre de parties,
+réparties sur un pool de processus, et compare leurs statistiques.
+
+Depuis la racine du dépôt :
+    python evaluate.py models/p10_model_50.json models/p10_model_100.json
+    python evaluate.py models/p15_model_*.json -size 15 -games 20000 \\
+        -workers 8 -seed 42 -out report.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from agent import QLearningAgent
+from board import Board
+from core import ACTIONS, DELTAS, END_RESULTS, RESULT_NAMES, REWARDS
+from policy import CompiledPolicy
+
+# Cause de fin des parties arrêtées par max_steps
+MAX_STEPS = "Max Steps"
+
+# Modèles lus par processus, réutilisés d'un lot à l'autre
+_MODELS = {}
+
+
+def _load_model(model_path):
+    if model_path not in _MODELS:
+        agent = QLearningAgent(actions=ACTIONS)
+        agent.load_model(model_path)
+        _MODELS[model_path] = agent.get_model()
+    return _MODELS[model_path]
+
+
+def play_agent(board, agent, max_steps=None):
+    """
+    Joue une partie avec l'agent complet, sans mise à jour de la
+    Q-table ; l'historique des positions suit les récompenses comme dans
+    QLearningAgent.learn. Même retour que CompiledPolicy.play : (pas
+    joués, résultat final ou None).
+    """
+    board.reset()
+    agent.reset_history()
+    board.steps = 0
+    while True:
+        action = agent.choose_action(board.get_state(), training=False)
+        board.snake_dir = DELTAS[action]
+        result = board.update()
+        agent.adjust_history_length(REWARDS[result])
+        if result in END_RESULTS:
+            return board.steps + 1, result
+        board.steps += 1
+        if max_steps is not None and board.steps >= max_steps:
+            return board.steps, None
+
+
+def evaluate_worker(
+    model_path,
+    games,
+    board_size,
+    nb_r_app,
+    nb_g_app,
+    seed,
+    max_steps,
+    compiled,
+):
+    """
+    Joue `games` parties du modèle sans apprentissage, dans un processus
+    du pool. Le lot est entièrement déterminé par `seed`, quel que soit le
+    processus qui l'exécute. Retourne les longueurs, les pas joués et la
+    cause de fin (indice de core.RESULT_NAMES, -1 pour max_steps).
+    """
+    # Agent neuf à chaque lot : rien ne dépend des lots déjà joués ici
+    rng = random.Random(seed)
+    agent = QLearningAgent(actions=ACTIONS, rng=rng)
+    agent.set_model(_load_model(model_path))
+    policy = CompiledPolicy.from_agent(agent) if compiled else agent
+    board = Board(
+        size=board_size, nb_r_app=nb_r_app, nb_g_app=nb_g_app, rng=rng
+    )
+    lengths = []
+    steps = []
+    results = []
+    for _ in range(games):
+        if compiled:
+            game_steps, result = policy.play(board, max_steps)
+        else:
+            game_steps, result = play_agent(board, policy, max_steps)
+        lengths.append(board.max_length)
+        steps.append(game_steps)
+        results.append(-1 if result is None else result)
+    return lengths, steps, results
+
+
+class EvaluationStats:
+    """
+    Statistiques agrégées au fil des lots : des histogrammes (Counter)
+    des longueurs et des pas plutôt que la liste des parties, pour des
+    percentiles exacts en mémoire bornée.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.lengths = Counter()
+        self.steps = Counter()
+        self.deaths = Counter()
+
+    def add(self, lengths, steps, results):
+        self.games += len(lengths)
+        self.lengths.update(lengths)
+        self.steps.update(steps)
+        self.deaths.update(
+            MAX_STEPS if result < 0 else RESULT_NAMES[result]
+            for result in results
+        )
+
+    @staticmethod
+    def summary(histogram):
+        """Moyenne, médiane, p95 et maximum d'un histogramme."""
+        total = sum(histogram.values())
+        if not total:
+            return {"mean": 0, "median": 0, "p95": 0, "max": 0}
+        values = sorted(histogram)
+        quantiles = {}
+        seen = 0
+        targets = [("median", 0.5), ("p95", 0.95)]
+        for value in values:
+            seen += histogram[value]
+            while targets and seen >= targets[0][1] * total:
+                quantiles[targets.pop(0)[0]] = value
+        mean = sum(value * count for value, count in histogram.items())
+        return {
+            "mean": round(mean / total, 3),
+            "median": quantiles["median"],
+            "p95": quantiles["p95"],
+            "max": values[-1],
+        }
+
+    def report(self):
+        return {
+            "games": self.games,
+            "length": self.summary(self.lengths),
+            "steps": self.summary(self.steps),
+            "deaths": dict(self.deaths.most_common()),
+        }
+
+
+def evaluate_model(
+    pool,
+    model_path,
+    games,
+    seed,
+    chunk=100,
+    board_size=10,
+    nb_r_app=1,
+    nb_g_app=2,
+    max_steps=None,
+    compiled=False,
+):
+    """
+    Évalue un modèle sur `games` parties, en lots de `chunk` parties
+    confiés à `pool` (ou joués ici si `pool` est None). Le lot i utilise
+    la graine `seed + i` : le résultat ne dépend pas du nombre de workers.
+    """
+    stats = EvaluationStats()
+    start = time.perf_counter()
+    args = [
+        (
+            model_path,
+            min(chunk, games - first),
+            board_size,
+            nb_r_app,
+            nb_g_app,
+            seed + i,
+            max_steps,
+            compiled,
+        )
+        for i, first in enumerate(range(0, games, chunk))
+    ]
+    if pool is None:
+        batches = (evaluate_worker(*arg) for arg in args)
+    else:
+        batches = pool.map(evaluate_worker, *zip(*args))
+    for lengths, steps, results in batches:
+        stats.add(lengths, steps, results)
+    report = stats.report()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    report["model"] = model_path
+    report["seconds"] = round(elapsed, 3)
+    report["games_per_s"] = round(stats.games / elapsed, 1)
+    return report
+
+
+def print_report(reports):
+    """Tableau comparatif des modèles évalués."""
+    print(
+        f"\n{'Modèle':<32}{'Parties':>9}{'Moy.':>8}{'Méd.':>6}{'p95':>6}"
+        f"{'Max':>6}{'Pas moy.':>10}{'Parties/s':>11}"
+    )
+    for report in reports:
+        length = report["length"]
+        print(
+            f"{os.path.basename(report['model']):<32}{report['games']:>9}"
+            f"{length['mean']:>8.2f}{length['median']:>6}{length['p95']:>6}"
+            f"{length['max']:>6}{report['steps']['mean']:>10.1f}"
+            f"{report['games_per_s']:>11.1f}"
+        )
+    for report in reports:
+        deaths = " | ".join(
+            f"{cause} : {100 * count / report['games']:.1f}%"
+            for cause, count in report["deaths"].items()
+        )
+        print(f"{os.path.basename(report['model'])} : {deaths}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate saved models over many games in parallel."
+    )
+    parser.add_argument("models", nargs="+", help="Model files to evaluate")
+    parser.add_argument(
+        "-games", type=int, default=1000, help="Games played per model"
+    )
+    parser.add_argument(
+        "-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of evaluation processes",
+    )
+    parser.add_argument(
+        "-chunk", type=int, default=100, help="Games per task sent to a worker"
+    )
+    parser.add_argument(
+        "-seed",
+        type=int,
+        help="Base seed of the games (random if omitted, saved in the report)",
+    )
+    parser.add_argument(
+        "-size", type=int, default=10, help="Size of the board (N x N)"
+    )
+    parser.add_argument(
+        "-green", type=int, default=2, help="Number of green apples"
+    )
+    parser.add_argument(
+        "-red", type=int, default=1, help="Number of red apples"
+    )
+    parser.add_argument(
+        "-max_steps",
+        type=int,
+        default=5000,
+        help="Stop a game after this many steps",
+    )
+    parser.add_argument(
+        "-compiled",
+        action="store_true",
+        help="Play with the compiled policy (same moves as the agent)",
+    )
+    parser.add_argument("-out", type=str, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2**31)
+    settings = {
+        "games": args.games,
+        "board_size": args.size,
+        "nb_g_app": args.green,
+        "nb_r_app": args.red,
+        "max_steps": args.max_steps,
+        "policy": "compiled" if args.compiled else "agent",
+        "seed": seed,
+        "chunk": args.chunk,
+    }
+    print(
+        f"Évaluation : {len(args.models)} modèle(s) x {args.games} parties"
+        f" | {args.workers} workers | Graine : {seed}"
+    )
+
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers)
+    try:
+        reports = []
+        for model_path in args.models:
+            reports.append(
+                evaluate_model(
+                    pool,
+                    model_path,
+                    args.games,
+                    seed,
+                    chunk=max(1, args.chunk),
+                    board_size=args.size,
+                    nb_r_app=args.red,
+                    nb_g_app=args.green,
+                    max_steps=args.max_steps,
+                    compiled=args.compiled,
+                )
+            )
+            print(
+                f"{model_path} : {reports[-1]['games_per_s']:.1f} parties/s"
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    print_report(reports)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "workers": args.workers,
+                        **settings,
+                    },
+                    "models": reports,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nRapport écrit dans : {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,36 @@
 # gui.py
 
 import os
+import queue
+import random
+import threading
 import time
 import tkinter as tk
+from types import SimpleNamespace
+import numpy as np
 from board import Board
 from agent import QLearningAgent
+from core import (
+    ACTION_INDEX,
+    ACTIONS,
+    DELTAS,
+    END_RESULTS,
+    REWARDS,
+)
+from metrics import HISTORY_WINDOW, RollingStats
+from state import CELLS, decode_state
 from tkinter import filedialog, messagebox
 
+# Couleur de chaque code de case (voir state.CELLS), et de la tête
+CELL_COLORS = tuple(
+    {"0": "white", "G": "green", "R": "red", "S": "cyan"}.get(cell, "white")
+    for cell in CELLS
+)
+HEAD_COLOR = "blue"
+
+# Pas joués par rappel Tk quand on saute à la fin de la session
+SKIP_CHUNK = 2000
+
 
 class SnakeGUI:
     def __init__(
@@ -19,15 +43,35 @@ class SnakeGUI:
         sessions=1,
         nb_r_app=1,
         nb_g_app=2,
+        qtable="dict",
+        checkpoint=None,
+        resume=False,
+        learner=None,
+        profiler=None,
+        live=False,
+        fps=30,
+        max_turbo=1000,
+        seed=None,
+        metrics=None,
+        q_temperature=None,
     ):
         self.master = master
 
         self.master.title("Entraînement Snake AI")
+        # Un seul générateur pour le plateau et l'agent : `seed` fixe tout
+        self.rng = random.Random(seed)
         self.board = Board(
-            size=board_size, nb_r_app=nb_r_app, nb_g_app=nb_g_app
+            size=board_size,
+            nb_r_app=nb_r_app,
+            nb_g_app=nb_g_app,
+            rng=self.rng,
         )
         self.agent = QLearningAgent(
-            actions=["UP", "DOWN", "LEFT", "RIGHT"], verbose=False
+            actions=ACTIONS,
+            verbose=False,
+            qtable=qtable,
+            learner=learner,
+            rng=self.rng,
         )
 
         # Définir le mode en fonction des arguments
@@ -43,6 +87,11 @@ class SnakeGUI:
             self.mode = "Game"  # Par défaut
 
         self.speed = 100
+        # Turbo : pas joués par rappel Tk (seule la dernière image est
+        # dessinée), de 1 à `max_turbo` par puissances de dix
+        self.turbo = 1
+        self.max_turbo = max(1, max_turbo)
+        self.skipping = False
         self.running = False
         self.sessions = sessions
         self.nb_r_app = (nb_r_app,)
@@ -51,14 +100,58 @@ class SnakeGUI:
         self.cell_size = 25
         self.dontlearn = dontlearn
         self.manual_mode = False
-        self.length_history = []
+        # Historique borné (HISTORY_WINDOW sessions) et agrégats ; les
+        # métriques complètes vont dans `metrics` (un MetricsSink)
+        self.length_history = RollingStats(HISTORY_WINDOW)
+        self.metrics = metrics
         self.current_session = 0
         self.save_model_path = save_model_path
         self.load_model_path = load_model_path
+        self.checkpoint = checkpoint
+        if checkpoint and resume:
+            self.current_session = checkpoint.resume(self.agent)
+        if q_temperature is not None:
+            self.agent.q_temperature = q_temperature
+        self.profiler = profiler
+        if profiler:
+            profiler.instrument_step(self.board, self.agent)
+            profiler.instrument(
+                self,
+                "draw_board",
+                "update_q_values_label",
+                "update_action_label",
+                "update_stats_label",
+                "draw_discovered_objects",
+            )
         self.show_spectrum = False
+        # Éléments du canvas créés une fois et réutilisés d'une image à
+        # l'autre : rectangles des cases, ronds du spectre, messages
+        self._grid_size = None
+        self._cell_items = []
+        self._cell_colors = []
+        self._drawn_cells = None
+        self._drawn_head = None
+        self._spectrum_items = []
+        self._spectrum_shown = 0
+        self.game_over_id = None
+        # Mode live : l'entraînement tourne dans un thread qui publie des
+        # images dans une file ; Tk n'affiche que la plus récente
+        self.live = live
+        self.fps = fps
+        self._frames = queue.Queue()
+        self._resume = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._polling = False
+        self._next_session_id = None
+        # Dernière image publiée par le thread : Tk ne redessine que depuis
+        # cette copie, jamais depuis le plateau ou l'agent en cours
+        self._last_frame = None
         self._setup_ui(master, board_size)
         self.draw_board()
         self.master.bind("<Key>", self.manual_control)
+        # Fermeture de la fenêtre : arrêt du thread, profil, métriques, modèle
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Afficher le message initial
         Mode_text = f"\n- {self.sessions} sessions {self.mode}."
@@ -136,6 +229,11 @@ class SnakeGUI:
         )
         self.show_spectrum_btn.grid(row=0, column=7, padx=5, pady=10)
 
+        self.skip_button = tk.Button(
+            self.control_frame, text=">>|", command=self.skip_session
+        )
+        self.skip_button.grid(row=0, column=8, padx=5, pady=10)
+
         # Frame pour les labels (statistiques, Q-values, objets découverts)
         self.labels_frame = tk.Frame(master)
         self.labels_frame.pack(fill=tk.BOTH, expand=True)
@@ -183,16 +281,50 @@ class SnakeGUI:
         )
 
     def increase_speed(self):
-        """Augmente la vitesse en diminuant le délai."""
+        """
+        Augmente la vitesse en diminuant le délai, puis, au délai minimal,
+        en passant au niveau de turbo suivant.
+        """
         self.step_mode = False
-        self.speed = max(20, self.speed - 20)  # Limite minimale de 10 ms
-        self.display_speed(f"Vitesse augmentée:\n{self.speed} ms par étape")
+        if self.speed > 20:
+            self.speed = max(20, self.speed - 20)  # Limite minimale de 20 ms
+        else:
+            self.turbo = min(self.turbo * 10, self.max_turbo)
+        self.display_speed(f"Vitesse augmentée:\n{self.speed_text()}")
 
     def decrease_speed(self):
-        """Diminue la vitesse en augmentant le délai."""
+        """
+        Diminue la vitesse : d'abord le turbo, puis en augmentant le délai.
+        """
         self.step_mode = False
-        self.speed = min(560, self.speed + 20)  # Limite maximale de 1000 ms
-        self.display_speed(f"Vitesse diminuée:\n{self.speed} ms par étape")
+        if self.turbo > 1:
+            self.turbo = max(1, self.turbo // 10)
+        else:
+            self.speed = min(560, self.speed + 20)  # Limite maximale 560 ms
+        self.display_speed(f"Vitesse diminuée:\n{self.speed_text()}")
+
+    def speed_text(self):
+        if self.turbo > 1:
+            return f"Turbo x{self.turbo} : {self.turbo} pas par image"
+        return f"{self.speed} ms par étape"
+
+    def skip_session(self):
+        """
+        Joue le reste de la session sans rien dessiner, par tranches de
+        SKIP_CHUNK pas pour garder l'interface réactive, puis affiche
+        l'image finale.
+        """
+        if self.live or self.manual_mode:
+            return
+        self.skipping = True
+        self.step_mode = False
+        if self._next_session_id:
+            # Entre deux sessions : lancer la suivante et la sauter
+            self.master.after_cancel(self._next_session_id)
+            self.run_training_sessions()
+        elif not self.running and self.current_session < self.sessions:
+            self.running = True
+            self.run_game_session()
 
     def update_status_label(self, message):
         """Met à jour le texte du label avec un message unique."""
@@ -205,7 +337,11 @@ class SnakeGUI:
             self.show_spectrum_btn.config(text="Spectre ON ")
         else:
             self.show_spectrum_btn.config(text="Spectre OFF")
-        self.draw_board()
+        if self.live and self._last_frame is not None:
+            frame = self._last_frame
+            self.draw_board(frame, frame.position_history)
+        elif self._thread is None or not self._thread.is_alive():
+            self.draw_board()
 
     def display_speed(self, message):
         """
@@ -217,13 +353,7 @@ class SnakeGUI:
         # Afficher le message
         if hasattr(self, "speed_message_id") and self.speed_message_id:
             self.canvas.delete(self.speed_message_id)
-        self.speed_message_id = self.canvas.create_text(
-            self.board.size * self.cell_size / 2,
-            self.board.size * self.cell_size - 20,
-            text=self.speed_message_text,
-            font=("Arial", 12, "bold"),
-            fill="black",
-        )
+        self._create_speed_message()
 
         # Planifier la suppression du message après 2 secondes
         self.master.after(2000, self.clear_speed_message)
@@ -236,17 +366,30 @@ class SnakeGUI:
         if hasattr(self, "speed_message_text"):
             del self.speed_message_text
 
-    def display_game_over(self):
-        """Affiche le message 'GAME OVER!' au centre de l'écran."""
-        self.canvas.create_text(
-            self.board.size * self.cell_size / 2,
+    def _create_speed_message(self):
+        self.speed_message_id = self.canvas.create_text(
             self.board.size * self.cell_size / 2,
-            text=(
-                f"GAME OVER!\nSession {self.current_session + 1}/"
-                f"{self.sessions}\nScore: {self.board.max_length}"
-            ),
+            self.board.size * self.cell_size - 20,
+            text=self.speed_message_text,
+            font=("Arial", 12, "bold"),
+            fill="black",
+            tags="message",
+        )
+
+    def display_game_over(self, board=None, subtitle=None):
+        """Affiche le message 'GAME OVER!' au centre de l'écran."""
+        board = board or self.board
+        if subtitle is None:
+            subtitle = f"Session {self.current_session + 1}/{self.sessions}"
+        if self.game_over_id:
+            self.canvas.delete(self.game_over_id)
+        self.game_over_id = self.canvas.create_text(
+            board.size * self.cell_size / 2,
+            board.size * self.cell_size / 2,
+            text=f"GAME OVER!\n{subtitle}\nScore: {board.max_length}",
             font=("Arial", 24, "bold"),
             fill="red",
+            tags="message",
         )
         self.canvas.update()
 
@@ -254,13 +397,21 @@ class SnakeGUI:
         self.running = True
         self.step_mode = False
         self.manual_mode = False
-        if self.current_session == 0:
+        if self.live:
+            self.start_live_training()
+        elif self._next_session_id:
+            # Session suivante déjà programmée : la lancer tout de suite
+            self.master.after_cancel(self._next_session_id)
+            self._next_session_id = None
+            self.run_training_sessions()
+        elif self.current_session == 0:
             self.run_training_sessions()
         else:
             # print("step_mode ==> ", self.step_mode)
             self.run_game_session()
 
     def run_training_sessions(self):
+        self._next_session_id = None
         if self.current_session < self.sessions:
             # Afficher la progression de la session en cours
             mode_txt = f"Mode: {self.mode}\nSession {self.current_session + 1}"
@@ -282,6 +433,10 @@ class SnakeGUI:
                     f"Mode: {self.mode}\n{path_txt}- {self.save_model_path}"
                 )
                 self.agent.save_model(self.save_model_path)
+            if self.profiler:
+                self.profiler.dump()
+            if self.metrics is not None:
+                self.metrics.flush()
 
     def open_settings_window(self):
         settings_window = tk.Toplevel(self.master)
@@ -419,13 +574,14 @@ class SnakeGUI:
             initialdir=models_dir,  # Forcer l'ouverture dans le dossier models
             filetypes=[
                 ("Fichiers JSON", "*.json"),
+                ("Modèles binaires", "*.bin"),
                 ("Tous les fichiers", "*.*"),
             ],
             defaultextension=".json",  # Ajouter automatiquement .json
         )
 
         # Ajouter automatiquement .json, Si l'utilisateur ne le spécifie pas
-        if file_path and not file_path.endswith(".json"):
+        if file_path and not file_path.endswith((".json", ".bin")):
             file_path += ".json"
 
         # Forcer l'enregistrement dans le dossier models
@@ -458,6 +614,7 @@ class SnakeGUI:
             initialdir=models_dir,
             filetypes=[
                 ("Fichiers JSON", "*.json"),
+                ("Modèles binaires", "*.bin"),
                 ("Tous les fichiers", "*.*"),
             ],
             title="Ouvrir le fichier des poids",
@@ -466,6 +623,7 @@ class SnakeGUI:
             self.load_model_path_var.set(file_path)
 
     def apply_settings(self, settings_window):
+        self.stop_live_training()
         # Valider la taille du plateau
         try:
             new_board_size = int(self.board_size_var.get())
@@ -479,7 +637,7 @@ class SnakeGUI:
 
         # reset all
         self.reset_board()
-        self.agent.q_table = {}
+        self.agent.q_table.clear()
         self.agent.discovered_objects = {}
         self.agent.wall_obj = ""
         self.agent.board_size = (0, 0)
@@ -530,7 +688,10 @@ class SnakeGUI:
             size=self.board_size,
             nb_r_app=self.nb_r_app,
             nb_g_app=self.nb_g_app,
+            rng=self.rng,
         )
+        if self.profiler:
+            self.profiler.instrument(self.board, "update", "get_state")
         self.update_status_label(
             f"Mode: {self.mode}\n{self.sessions} sessions {self.mode}.\n"
             f"Sur un plateau de taille {self.board_size}.\n"
@@ -540,134 +701,357 @@ class SnakeGUI:
         # Fermer la fenêtre modale
         settings_window.destroy()
 
-    def run_game_session(self):
-        if self.running or self.step_mode:
-            state = self.board.get_state()
-            action = self.agent.choose_action(str(state), training=True)
-            direction_mapping = {
-                "UP": (-1, 0),
-                "DOWN": (1, 0),
-                "LEFT": (0, -1),
-                "RIGHT": (0, 1),
-            }
-            if action in direction_mapping:
-                self.board.snake_dir = direction_mapping[action]
+    def train_step(self):
+        """Joue et apprend un pas ; retourne (état, action, résultat)."""
+        state = self.board.get_state()
+        action = self.agent.choose_action(state, training=True)
+        self.board.snake_dir = DELTAS[action]
 
-            result = self.board.update()
-            reward = -1
-            if result == "Ate Green Apple":
-                reward = 20
-            elif result == "Ate Red Apple":
-                reward = -10
-            elif result == "Hit Snake Body":
-                reward = -50
-            elif result == "Game Over":
-                reward = -100
-            self.agent.handle_new_objects(str(state), action, reward)
-
-            if result != "Game Over" and result != "Hit Snake Body":
-                next_state = self.board.get_state()
-                self.agent.learn(str(state), action, reward, str(next_state))
-                self.agent.decay_exploration()
-                self.board.steps += 1
+        result = self.board.update()
+        reward = REWARDS[result]
+        self.agent.handle_new_objects(state, action, reward)
 
-            # Mettre à jour les labels
-            self.update_q_values_label(state)
-            self.update_action_label(action)
-            self.draw_board()
-            self.update_stats_label()
-            self.draw_discovered_objects()
+        if result not in END_RESULTS:
+            next_state = self.board.get_state()
+            self.agent.learn(state, action, reward, next_state)
+            self.agent.decay_exploration()
+            self.board.steps += 1
+        return state, action, result
 
-            if result == "Game Over" or result == "Hit Snake Body":
-                self.length_history.append(self.board.max_length)
+    def run_game_session(self):
+        if self.running or self.step_mode:
+            if self.step_mode and not self.running:
+                steps = 1
+            elif self.skipping:
+                steps = SKIP_CHUNK
+            else:
+                steps = self.turbo
+            for _ in range(steps):
+                state, action, result = self.train_step()
+                if result in END_RESULTS:
+                    break
+
+            # Mettre à jour les labels (seulement l'image finale en saut)
+            if not self.skipping or result in END_RESULTS:
+                self.update_q_values_label(state)
+                self.update_action_label(action)
+                self.draw_board()
+                self.update_stats_label()
+                self.draw_discovered_objects()
+
+            if result in END_RESULTS:
+                self.skipping = False
+                self.record_session(self.current_session + 1)
                 self.display_game_over()
                 self.running = False
                 self.current_session += 1
+                if self.checkpoint and self.mode != "Dontlearn":
+                    self.checkpoint.step(self.agent, self.current_session)
                 self.agent.reset_history()
-                self.run_training_sessions()
-                if self.current_session != self.sessions:
-                    time.sleep(2)
-                    # time.sleep(0.5)
+                if self.current_session < self.sessions:
+                    # Pause de 2 s sans bloquer la boucle Tk
+                    self._next_session_id = self.master.after(
+                        2000, self.run_training_sessions
+                    )
+                else:
+                    self.run_training_sessions()
 
             elif self.running:
-                self.master.after(self.speed, self.run_game_session)
+                self.master.after(
+                    1 if self.skipping else self.speed, self.run_game_session
+                )
 
-    def draw_board(self):
-        self.canvas.delete("all")
-        size = self.board.size
-        for x in range(size):
-            for y in range(size):
-                color = "white"
-                if (x, y) in self.board.green_apples:
-                    color = "green"
-                elif (x, y) in self.board.red_apples:
-                    color = "red"
-                elif (x, y) in self.board.snake:
-                    color = "blue" if (x, y) == self.board.snake[0] else "cyan"
-                self.canvas.create_rectangle(
-                    y * self.cell_size,
-                    x * self.cell_size,
-                    (y + 1) * self.cell_size,
-                    (x + 1) * self.cell_size,
-                    fill=color,
-                    outline="black",
+    def watch_episodes(self, episodes):
+        """
+        Rejoue des épisodes enregistrés (voir recorder.py), un pas toutes
+        les `self.speed` ms, sur un plateau à part : le plateau et l'agent
+        de l'entraînement ne sont pas touchés.
+        """
+        self._watched = iter(episodes)
+        self._watch_next_episode()
+
+    def _watch_next_episode(self):
+        episode = next(self._watched, None)
+        if episode is None:
+            self.update_status_label("Relecture terminée.")
+            return
+        self._watch_index = episode.index
+        seed = "aucune" if episode.seed is None else episode.seed
+        self.update_status_label(
+            f"Relecture : épisode {episode.index}\n"
+            f"{len(episode)} pas | Graine : {seed}"
+        )
+        self._watch_frames = episode.replay()
+        self._watch_board = None
+        self._watch_step()
+
+    def _watch_step(self):
+        frame = next(self._watch_frames, None)
+        if frame is None:
+            if self._watch_board is not None:
+                self.display_game_over(
+                    self._watch_board, f"Épisode {self._watch_index}"
                 )
-        if self.show_spectrum:
-            self.draw_position_history()
+            self.master.after(2000, self._watch_next_episode)
+            return
+        board, action, _ = frame
+        self._watch_board = board
+        self.draw_board(board, history=())
+        self.update_action_label(action)
+        self.update_stats_label(board)
+        self.master.after(self.speed, self._watch_step)
+
+    def capture_frame(self, state=None, action=None):
+        """
+        Copie de ce qu'il faut afficher du plateau et de l'agent, que Tk
+        peut dessiner pendant que le thread d'entraînement continue. Ses
+        attributs portent les noms de Board et QLearningAgent.
+        """
+        board = self.board
+        agent = self.agent
+        return SimpleNamespace(
+            cells=bytes(board.cells),
+            size=board.size,
+            snake=(board.snake[0],),
+            steps=board.steps,
+            max_length=board.max_length,
+            max_length_reached=board.max_length_reached,
+            position_history=tuple(agent.position_history),
+            discovered_objects=dict(agent.discovered_objects),
+            wall_obj=agent.wall_obj,
+            board_size=agent.board_size,
+            state=state,
+            action=action,
+            q_values=None if state is None else agent.get_q_values(state),
+        )
 
-        if hasattr(self, "speed_message_text"):
-            self.speed_message_id = self.canvas.create_text(
-                self.board.size * self.cell_size / 2,
-                self.board.size * self.cell_size - 20,
-                text=self.speed_message_text,
-                font=("Arial", 12, "bold"),
-                fill="black",
+    def render_frame(self, frame):
+        """Affiche une image capturée par capture_frame."""
+        self._last_frame = frame
+        self.draw_board(frame, frame.position_history)
+        self.update_stats_label(frame)
+        if frame.state is not None:
+            self.update_q_values_label(frame.state, frame.q_values)
+            self.update_action_label(frame.action)
+        self.draw_discovered_objects(frame)
+
+    def start_live_training(self):
+        """Lance ou relance le thread d'entraînement et l'affichage."""
+        if self._thread is None or not self._thread.is_alive():
+            if self.current_session >= self.sessions:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._train_loop, daemon=True
+            )
+            self._thread.start()
+        self._resume.set()
+        if not self._polling:
+            self._polling = True
+            self._poll_frames()
+
+    def stop_live_training(self):
+        """Arrête le thread d'entraînement et attend sa fin."""
+        if self._thread is not None and self._thread.is_alive():
+            self._stop.set()
+            self._resume.set()
+            self._thread.join()
+        self._thread = None
+
+    def _train_loop(self):
+        """
+        Thread d'entraînement : enchaîne les sessions à pleine vitesse et
+        publie au plus `fps` images par seconde, plus chaque fin de session.
+        """
+        clock = time.perf_counter
+        interval = 1 / self.fps
+        last_frame = 0.0
+        while self.current_session < self.sessions:
+            self.board.reset()
+            self.board.steps = 0
+            result = None
+            while result not in END_RESULTS:
+                if not self._resume.is_set():
+                    self._resume.wait()
+                if self._stop.is_set():
+                    return
+                state, action, result = self.train_step()
+                now = clock()
+                if now - last_frame >= interval or result in END_RESULTS:
+                    self._frames.put(
+                        ("frame", self.capture_frame(state, action))
+                    )
+                    last_frame = now
+            length = self.board.max_length
+            self.current_session += 1
+            if self.metrics is not None:
+                self.record_metrics(self.current_session)
+            if self.checkpoint and self.mode != "Dontlearn":
+                self.checkpoint.step(self.agent, self.current_session)
+            self.agent.reset_history()
+            self._frames.put(
+                (
+                    "session",
+                    self.current_session,
+                    length,
+                    self.board.steps + 1,
+                )
             )
+        self._frames.put(("done",))
 
-    def draw_position_history(self):
-        """Dessine l'historique des positions du serpent sur le canvas."""
-        position_history = self.agent.get_position_history()
-        for position in position_history:
-            x, y = position
-            self.canvas.create_oval(
-                y * self.cell_size + self.cell_size // 4,
-                x * self.cell_size + self.cell_size // 4,
-                (y + 1) * self.cell_size - self.cell_size // 4,
-                (x + 1) * self.cell_size - self.cell_size // 4,
-                fill="gray",
-                outline="gray",
-                # font=("Arial", 7, "bold"),
+    def _poll_frames(self):
+        """
+        Côté Tk, à cadence fixe : vide la file, garde toutes les fins de
+        session mais n'affiche que l'image la plus récente.
+        """
+        frame = None
+        done = False
+        while True:
+            try:
+                message = self._frames.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "frame":
+                frame = message[1]
+            elif message[0] == "session":
+                self.length_history.add(*message[1:])
+                self.status_label.config(
+                    text=f"Mode: {self.mode} (live)\nSession"
+                    f" {message[1]}/{self.sessions} terminée."
+                )
+            else:
+                done = True
+        if frame is not None:
+            self.render_frame(frame)
+        if done:
+            self._polling = False
+            self.running = False
+            self.run_training_sessions()
+        elif self._thread is not None and self._thread.is_alive():
+            self.master.after(max(1, int(1000 / self.fps)), self._poll_frames)
+        else:
+            self._polling = False
+
+    def _create_grid(self, size):
+        """Crée une fois les rectangles des cases d'un plateau `size`."""
+        self.canvas.delete("all")
+        self._cell_items = [
+            self.canvas.create_rectangle(
+                y * self.cell_size,
+                x * self.cell_size,
+                (y + 1) * self.cell_size,
+                (x + 1) * self.cell_size,
+                fill=CELL_COLORS[0],
+                outline="black",
             )
+            for x in range(size)
+            for y in range(size)
+        ]
+        self._cell_colors = [CELL_COLORS[0]] * (size * size)
+        self._drawn_cells = np.zeros(size * size, dtype=np.uint8)
+        self._drawn_head = None
+        self._spectrum_items = []
+        self._spectrum_shown = 0
+        self.game_over_id = None
+        self.speed_message_id = None
+        if hasattr(self, "speed_message_text"):
+            self._create_speed_message()
+        self._grid_size = size
 
-    def update_q_values_label(self, state):
+    def draw_board(self, board=None, history=None):
+        """
+        Met à jour le plateau affiché : seules les cases dont le contenu a
+        changé depuis l'image précédente (tête, queue, pommes) sont
+        recolorées, sans recréer d'éléments du canvas. `board` et `history`
+        (par défaut ceux du jeu) peuvent venir d'une image capturée.
+        """
+        board = board or self.board
+        size = board.size
+        if self._grid_size != size:
+            self._create_grid(size)
+        if self.game_over_id:
+            self.canvas.delete(self.game_over_id)
+            self.game_over_id = None
+
+        cells = np.frombuffer(board.cells, dtype=np.uint8)
+        head_x, head_y = board.snake[0]
+        head = head_x * size + head_y
+        changed = set(np.flatnonzero(cells != self._drawn_cells).tolist())
+        if head != self._drawn_head:
+            changed.add(head)
+            if self._drawn_head is not None:
+                changed.add(self._drawn_head)
+        for index in changed:
+            color = HEAD_COLOR if index == head else CELL_COLORS[cells[index]]
+            if self._cell_colors[index] != color:
+                self.canvas.itemconfigure(self._cell_items[index], fill=color)
+                self._cell_colors[index] = color
+        self._drawn_cells[:] = cells
+        self._drawn_head = head
+
+        self.draw_position_history(history)
+
+    def draw_position_history(self, history=None):
+        """
+        Dessine l'historique des positions du serpent sur le canvas, en
+        déplaçant des ronds déjà créés ; ils sont cachés sans le spectre.
+        """
+        if history is None:
+            history = self.agent.get_position_history()
+        positions = history if self.show_spectrum else ()
+        margin = self.cell_size // 4
+        created = False
+        for i, (x, y) in enumerate(positions):
+            coords = (
+                y * self.cell_size + margin,
+                x * self.cell_size + margin,
+                (y + 1) * self.cell_size - margin,
+                (x + 1) * self.cell_size - margin,
+            )
+            if i < len(self._spectrum_items):
+                self.canvas.coords(self._spectrum_items[i], *coords)
+                if i >= self._spectrum_shown:
+                    self.canvas.itemconfigure(
+                        self._spectrum_items[i], state="normal"
+                    )
+            else:
+                self._spectrum_items.append(
+                    self.canvas.create_oval(
+                        *coords, fill="gray", outline="gray"
+                    )
+                )
+                created = True
+        for item in self._spectrum_items[len(positions): self._spectrum_shown]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self._spectrum_shown = len(positions)
+        if created:
+            # Les messages restent au-dessus des nouveaux ronds
+            self.canvas.tag_raise("message")
+
+    def update_q_values_label(self, state, q_values=None):
         """
         Met à jour le label pour afficher les Q-values pour l'état actuel.
         """
-        q_values = self.agent.get_q_values(str(state))
-        directions = ["UP", "DOWN", "LEFT", "RIGHT"]
-        state_mapping = {
-            "UP": state[0],
-            "DOWN": state[1],
-            "LEFT": state[2],
-            "RIGHT": state[3],
-        }
+        if q_values is None:
+            q_values = self.agent.get_q_values(state)
+        objects = decode_state(state)
         q_values_text = "Q-values de l'état actuel:\n"
-        for action in directions:
+        for action, obj in zip(ACTIONS, objects):
             q_values_text += (
-                f"{action:<7}\t=> {state_mapping[action]}"
-                f" : {q_values[action]:.2f}\n"
+                f"{action:<7}\t=> {obj} : {q_values[action]:.2f}\n"
             )
         self.q_values_label.config(text=q_values_text)
 
     def update_action_label(self, action):
         """Met à jour le label pour afficher l'action choisie."""
-        self.action_label.config(text=f"Action choisie: {action}")
+        self.action_label.config(text=f"Action choisie: {ACTIONS[action]}")
 
-    def update_stats_label(self):
+    def update_stats_label(self, board=None):
+        board = board or self.board
         stats_text = (
-            f"\nStats:\nSteps: {self.board.steps}\n"
-            f"Score: {self.board.max_length}\n"
-            f"Max Length: {self.board.max_length_reached}\n"
+            f"\nStats:\nSteps: {board.steps}\n"
+            f"Score: {board.max_length}\n"
+            f"Max Length: {board.max_length_reached}\n"
             f"Length History"
         )
         self.stats_label.config(text=stats_text)
@@ -681,23 +1065,49 @@ class SnakeGUI:
             history_window, wrap=tk.WORD, width=40, height=20
         )
         history_text.pack(padx=10, pady=10)
-        # Ajouter les longueurs à la fenêtre
-        for i, length in enumerate(self.length_history, start=1):
+        # Ajouter les dernières longueurs et le résumé à la fenêtre
+        history_text.insert(tk.END, self.length_history.summary() + "\n\n")
+        for session, length in self.length_history.recent:
             history_text.insert(
-                tk.END, f"Session {i}: Max Length = {length}\n"
+                tk.END, f"Session {session}: Max Length = {length}\n"
             )
         # Empêcher l'utilisateur de modifier le texte
         history_text.config(state=tk.DISABLED)
 
+    def record_session(self, session):
+        """Note la session terminée sur self.board (historique, métriques)."""
+        self.length_history.add(
+            session, self.board.max_length, self.board.steps + 1
+        )
+        if self.metrics is not None:
+            self.record_metrics(session)
+
+    def record_metrics(self, session):
+        self.metrics.record(
+            session,
+            self.board.max_length,
+            self.board.steps + 1,
+            self.board.score,
+            self.agent.exploration_rate,
+            len(self.agent.q_table),
+        )
+
     def pause_training(self):
         self.running = False
+        self.skipping = False
+        self._resume.clear()
 
     def step_training(self):
+        if self.live:
+            self.pause_training()
+            return
         self.running = False
         self.step_mode = True
         self.run_game_session()
 
     def reset_board(self):
+        self.stop_live_training()
+        self._last_frame = None
         self.current_session = 0
         self.board.reset()
         self.board.steps = 0
@@ -711,56 +1121,68 @@ class SnakeGUI:
     def toggle_manual_mode(self):
         self.manual_mode = not self.manual_mode
         self.running = False
+        if self.live and self._thread is not None:
+            # Le clavier joue sur le plateau et l'agent du thread : il est
+            # arrêté (une pause ne l'attend pas) avant de les lui confier
+            self.stop_live_training()
+            # Fins de session encore en file, puis le plateau réel
+            self._poll_frames()
+            self.draw_board()
+            self.update_stats_label()
+        self._resume.clear()
 
     def manual_control(self, event):
-        if not self.manual_mode:
+        if (
+            not self.manual_mode
+            or self._resume.is_set()
+            or (self._thread is not None and self._thread.is_alive())
+        ):
             return
-        key_to_direction = {
-            "Up": (-1, 0),
-            "Down": (1, 0),
-            "Left": (0, -1),
-            "Right": (0, 1),
-        }
-        if event.keysym in key_to_direction:
-            self.board.snake_dir = key_to_direction[event.keysym]
+        action = ACTION_INDEX.get(event.keysym.upper())
+        if action is not None:
+            self.board.snake_dir = DELTAS[action]
             result = self.board.update()
-            if result in ["Moved", "Ate Green Apple", "Ate Red Apple"]:
+            if result not in END_RESULTS:
                 self.board.steps += 1
             self.draw_board()
             self.update_stats_label()
-            if result == "Game Over" or result == "Hit Snake Body":
+            if result in END_RESULTS:
                 self.display_game_over()
                 self.manual_mode = False
 
     def on_close(self):
-        if self.dontlearn:
-            return
-        elif self.save_model_path:
+        self.stop_live_training()
+        if self.profiler:
+            self.profiler.dump()
+        if self.metrics is not None:
+            self.metrics.close()
+        if not self.dontlearn and self.save_model_path:
             self.agent.save_model(self.save_model_path)
         self.master.destroy()
 
-    def draw_discovered_objects(self):
+    def draw_discovered_objects(self, agent=None):
         """
         Affiche les objets découverts dans l'interface graphique,
         avec la mention '-Wall' pour le mur.
         """
+        agent = agent or self.agent
         if self.mode == "Dontlearn":
             text = "Ne gère pas les objets."
             self.objects_discovered_label.config(
                 text=f"Objets découverts:\nMode Dontlearn.\n{text}"
             )
         else:
-            discovered_objects = self.agent.discovered_objects
+            discovered_objects = agent.discovered_objects
             if discovered_objects:
                 objects_text = ""
                 obj_text = "Objets découverts:\nboard_size:"
                 for obj, reward in discovered_objects.items():
-                    if obj == self.agent.wall_obj:
+                    if obj == agent.wall_obj:
                         objects_text += f"'{obj}': {reward} '-Wall'\n"
                     else:
                         objects_text += f"'{obj}': {reward}\n"
                 self.objects_discovered_label.config(
-                    text=f"{obj_text} {self.agent.board_size}\n{objects_text}"
+                    text=f"{obj_text} {agent.board_size}\n{objects_text}"
                 )
             else:
                 self.objects_discovered_label.config(
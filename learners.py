@@ -0,0 +1,166 @@
+# learners.py
+from collections import deque
+
+
+class QLearner:
+    """
+    Règle historique de l'agent : TD à un pas (Q-learning), cible
+    r + gamma * max Q(s'), pas d'apprentissage learning_rate * (1 - epsilon).
+    La fin de partie n'est pas distinguée, comme avant.
+    """
+
+    def __init__(self, discount=None):
+        self.discount = discount
+
+    def gamma(self, agent):
+        if self.discount is None:
+            return agent.discount_factor
+        return self.discount
+
+    def bootstrap(self, agent, state):
+        """Valeur de l'état suivant utilisée dans la cible."""
+        return agent.q_table.best_value(state)
+
+    def step(self, agent, state, action, target):
+        """Rapproche Q(state, action) de `target`."""
+        td_error = target - agent.q_table.get(state, action)
+        agent.q_table.add(
+            state,
+            action,
+            agent.learning_rate * td_error * (1 - agent.exploration_rate),
+        )
+
+    def update(self, agent, state, action, reward, next_state, done=False):
+        target = reward + self.gamma(agent) * self.bootstrap(agent, next_state)
+        self.step(agent, state, action, target)
+
+    def end_episode(self, agent):
+        """Appelé à chaque fin de partie (QLearningAgent.reset_history)."""
+
+
+class ExpectedSarsaLearner(QLearner):
+    """
+    Expected SARSA à un pas : l'état suivant vaut l'espérance de ses
+    Q-values sous la politique epsilon-greedy plutôt que leur maximum.
+    Les fins de partie ne sont pas prolongées.
+    """
+
+    def bootstrap(self, agent, state):
+        q_values = agent.q_table.values(state)
+        epsilon = agent.exploration_rate
+        mean = sum(q_values) / len(q_values)
+        return (1 - epsilon) * max(q_values) + epsilon * mean
+
+    def update(self, agent, state, action, reward, next_state, done=False):
+        target = reward
+        if not done:
+            target += self.gamma(agent) * self.bootstrap(agent, next_state)
+        self.step(agent, state, action, target)
+
+
+class NStepLearner(QLearner):
+    """
+    Retours à n pas : Q(s_t, a_t) vise r_t + ... + gamma^(n-1) r_(t+n-1)
+    + gamma^n max Q(s_(t+n)). Les transitions sont gardées jusqu'à ce que
+    n récompenses soient connues ; en fin de partie, les retours restants
+    sont calculés sans prolongement (partie perdue) ou avec le dernier état
+    (partie interrompue).
+    """
+
+    def __init__(self, n=3, discount=None):
+        super().__init__(discount)
+        if n < 1:
+            raise ValueError(f"n doit être au moins 1 : {n}")
+        self.n = n
+        self.trajectory = deque()
+        self.last_state = None
+
+    def update(self, agent, state, action, reward, next_state, done=False):
+        self.trajectory.append((state, action, reward))
+        self.last_state = next_state
+        if done:
+            self._flush(agent, 0.0)
+        elif len(self.trajectory) == self.n:
+            gamma = self.gamma(agent)
+            target = self.bootstrap(agent, next_state)
+            for _, _, reward in reversed(self.trajectory):
+                target = reward + gamma * target
+            state, action, _ = self.trajectory.popleft()
+            self.step(agent, state, action, target)
+
+    def end_episode(self, agent):
+        if self.trajectory:
+            self._flush(agent, self.bootstrap(agent, self.last_state))
+
+    def _flush(self, agent, value):
+        """Met à jour la trajectoire en attente, retours pris depuis la fin."""
+        gamma = self.gamma(agent)
+        target = value
+        updates = []
+        for state, action, reward in reversed(self.trajectory):
+            target = reward + gamma * target
+            updates.append((state, action, target))
+        for state, action, target in reversed(updates):
+            self.step(agent, state, action, target)
+        self.trajectory.clear()
+
+
+class TDLambdaLearner(QLearner):
+    """
+    Q(lambda) avec traces d'éligibilité remplaçantes : chaque erreur TD
+    est reportée sur les couples (état, action) récents, pondérés par
+    (gamma * lambda)^âge. Les traces sous `min_trace` sont abandonnées et
+    toutes sont effacées en fin de partie.
+    """
+
+    def __init__(self, trace_decay=0.8, discount=None, min_trace=0.01):
+        super().__init__(discount)
+        self.trace_decay = trace_decay
+        self.min_trace = min_trace
+        self.traces = {}
+
+    def update(self, agent, state, action, reward, next_state, done=False):
+        target = reward
+        if not done:
+            target += self.gamma(agent) * self.bootstrap(agent, next_state)
+        td_error = target - agent.q_table.get(state, action)
+        alpha = agent.learning_rate * (1 - agent.exploration_rate)
+        decay = self.gamma(agent) * self.trace_decay
+        traces = self.traces
+        traces[(state, action)] = 1.0
+        q_table = agent.q_table
+        for key, trace in list(traces.items()):
+            q_table.add(key[0], key[1], alpha * td_error * trace)
+            trace *= decay
+            if trace < self.min_trace:
+                del traces[key]
+            else:
+                traces[key] = trace
+        if done:
+            traces.clear()
+
+    def end_episode(self, agent):
+        self.traces.clear()
+
+
+LEARNERS = {
+    "q": QLearner,
+    "expected": ExpectedSarsaLearner,
+    "nstep": NStepLearner,
+    "lambda": TDLambdaLearner,
+}
+
+
+def make_learner(name, n_step=3, trace_decay=0.8, discount=None):
+    """Crée une règle d'apprentissage à partir de son nom."""
+    if name == "nstep":
+        return NStepLearner(n_step, discount)
+    if name == "lambda":
+        return TDLambdaLearner(trace_decay, discount)
+    try:
+        return LEARNERS[name](discount)
+    except KeyError:
+        raise ValueError(
+            f"Règle d'apprentissage inconnue : {name} "
+            f"(choix : {', '.join(LEARNERS)})"
+        )
@@ -2,6 +2,14 @@
 import argparse
 from gui import SnakeGUI
 from cli import COMMAND_LINE
+from parallel import run_parallel_training
+from checkpoint import Checkpointer
+from core import BOARD_FULL, DELTAS, END_RESULTS, GAME_OVER
+from learners import LEARNERS, make_learner
+from metrics import MetricsSink
+from profiler import Profiler
+from recorder import EpisodeRecorder, read_episodes
+from replay import ReplayBuffer
 
 
 def main():
@@ -44,8 +52,288 @@ def main():
         default=1,
         help="Total number of the red appel",
     )
+    parser.add_argument(
+        "-headless",
+        action="store_true",
+        help="Train without any rendering, at full speed",
+    )
+    parser.add_argument(
+        "-report",
+        type=int,
+        default=100,
+        help="Sessions between two progress lines in headless mode",
+    )
+    parser.add_argument(
+        "-qtable",
+        choices=["dict", "array"],
+        default="dict",
+        help="Q-table storage backend (array: NumPy float32 rows)",
+    )
+    parser.add_argument(
+        "-batch",
+        type=int,
+        default=0,
+        help=(
+            "Headless only: number of games stepped together (BatchBoard),"
+            " played epsilon-greedy on the Q-table instead of the agent's"
+            " free-space policy"
+        ),
+    )
+    parser.add_argument(
+        "-workers",
+        type=int,
+        default=1,
+        help="Number of parallel training processes (Q-tables are merged)",
+    )
+    parser.add_argument(
+        "-sync",
+        type=int,
+        default=100,
+        help="Sessions per worker between two Q-table merges",
+    )
+    parser.add_argument(
+        "-merge",
+        choices=["visits", "mean"],
+        default="visits",
+        help="Q-table merge: visit-count weighted or plain average",
+    )
+    parser.add_argument(
+        "-checkpoint",
+        type=str,
+        help="Path of the periodic checkpoint (binary model format)",
+    )
+    parser.add_argument(
+        "-checkpoint_every",
+        type=int,
+        default=100,
+        help="Sessions between two checkpoints (0 to disable)",
+    )
+    parser.add_argument(
+        "-checkpoint_seconds",
+        type=float,
+        default=0,
+        help="Seconds between two checkpoints (0 to disable)",
+    )
+    parser.add_argument(
+        "-deltas",
+        action="store_true",
+        help="Append only the changed Q-table rows between full checkpoints",
+    )
+    parser.add_argument(
+        "-resume",
+        action="store_true",
+        help="Resume training from the latest checkpoint",
+    )
+    parser.add_argument(
+        "-learner",
+        choices=list(LEARNERS),
+        default="q",
+        help="Update rule: one-step Q-learning, expected SARSA,"
+        " n-step returns or Q(lambda) eligibility traces",
+    )
+    parser.add_argument(
+        "-nstep",
+        type=int,
+        default=3,
+        help="Number of rewards in an n-step return (-learner nstep)",
+    )
+    parser.add_argument(
+        "-trace_decay",
+        type=float,
+        default=0.8,
+        help="Eligibility trace decay lambda (-learner lambda)",
+    )
+    parser.add_argument(
+        "-gamma",
+        type=float,
+        help="Discount used by the learner (default: the model's own)",
+    )
+    parser.add_argument(
+        "-q_temperature",
+        type=float,
+        help="Temperature of the Q-weighted tie-break (default: the model's"
+        " own, 1.0 for a new model)",
+    )
+    parser.add_argument(
+        "-replay",
+        type=int,
+        default=0,
+        help="Replay buffer capacity in transitions (0 to disable)",
+    )
+    parser.add_argument(
+        "-replay_batch",
+        type=int,
+        default=32,
+        help="Transitions per replayed minibatch",
+    )
+    parser.add_argument(
+        "-replay_every",
+        type=int,
+        default=1,
+        help="New transitions between two replayed minibatches",
+    )
+    parser.add_argument(
+        "-prioritized",
+        action="store_true",
+        help="Sample the replay buffer by TD error instead of uniformly",
+    )
+    parser.add_argument(
+        "-profile",
+        action="store_true",
+        help="Time each phase of the game step and print a report at the end",
+    )
+    parser.add_argument(
+        "-profile_out",
+        type=str,
+        help="With -profile, also run cProfile and write pstats to this file",
+    )
+    parser.add_argument(
+        "-live",
+        action="store_true",
+        help="Visual mode: train in a background thread at full speed and"
+        " display the latest state at a fixed frame rate",
+    )
+    parser.add_argument(
+        "-fps",
+        type=int,
+        default=30,
+        help="Frames per second displayed with -live",
+    )
+    parser.add_argument(
+        "-max_turbo",
+        type=int,
+        default=1000,
+        help="Visual mode: highest number of steps played per frame",
+    )
+    parser.add_argument(
+        "-frame_interval",
+        type=float,
+        default=0.0,
+        help="Command-line mode: minimum seconds between two drawn frames",
+    )
+    parser.add_argument(
+        "-compiled",
+        action="store_true",
+        help="Evaluate the -load model headless with its compiled policy",
+    )
+    parser.add_argument(
+        "-max_steps",
+        type=int,
+        help="Headless modes: stop a session after this many steps",
+    )
+    parser.add_argument(
+        "-seed",
+        type=int,
+        help="Seed of the board and agent generators (reproducible runs)",
+    )
+    parser.add_argument(
+        "-record",
+        type=str,
+        help="Append every played session to this episode log",
+    )
+    parser.add_argument(
+        "-watch",
+        type=str,
+        help="Replay the sessions of an episode log (in the GUI with -visual)",
+    )
+    parser.add_argument(
+        "-episode",
+        type=int,
+        nargs="+",
+        help="With -watch: numbers of the episodes to replay (default: all)",
+    )
+    parser.add_argument(
+        "-metrics",
+        type=str,
+        help="Stream per-session metrics to this file (.csv, else JSONL)",
+    )
+    parser.add_argument(
+        "-metrics_max_mb",
+        type=float,
+        default=64,
+        help="Rotate the metrics file beyond this size in MiB (0: never)",
+    )
+    parser.add_argument(
+        "-metrics_backups",
+        type=int,
+        default=5,
+        help="Number of rotated metrics files kept",
+    )
     args = parser.parse_args()
 
+    if args.compiled:
+        if not args.load:
+            parser.error("-compiled requires -load")
+        if args.visual or args.batch > 0 or args.workers > 1:
+            parser.error("-compiled runs its own single-process evaluation")
+        if args.replay > 0 or args.save or args.checkpoint:
+            parser.error("-compiled does not learn nor save a model")
+        args.headless = True
+    if args.q_temperature is not None and args.q_temperature <= 0:
+        parser.error("-q_temperature must be positive")
+    if args.batch > 0 and args.learner != "q":
+        parser.error("-batch only supports the one-step -learner q")
+    replay = None
+    if args.replay > 0:
+        if args.visual or (args.workers > 1 and not args.dontlearn):
+            parser.error("-replay is only supported by the command-line modes")
+        replay = ReplayBuffer(
+            args.replay,
+            batch_size=args.replay_batch,
+            every=args.replay_every,
+            prioritized=args.prioritized,
+            seed=args.seed,
+        )
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile_out)
+    elif args.profile_out:
+        parser.error("-profile_out requires -profile")
+    if profiler and args.workers > 1 and not args.dontlearn:
+        parser.error("-profile does not cover the -workers processes")
+    learner = make_learner(
+        args.learner,
+        n_step=args.nstep,
+        trace_decay=args.trace_decay,
+        discount=args.gamma,
+    )
+
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpointer(
+            args.checkpoint,
+            every=args.checkpoint_every,
+            seconds=args.checkpoint_seconds,
+            deltas=args.deltas,
+        )
+    elif args.resume:
+        parser.error("-resume requires -checkpoint")
+
+    recorder = None
+    if args.record:
+        if (
+            args.visual
+            or args.batch > 0
+            or (args.workers > 1 and not args.dontlearn)
+        ):
+            parser.error("-record is only supported by the one-game modes")
+        if args.watch:
+            parser.error("-record and -watch cannot be combined")
+        recorder = EpisodeRecorder(args.record)
+    if args.episode and not args.watch:
+        parser.error("-episode requires -watch")
+    watched = set(args.episode) if args.episode else None
+
+    metrics = None
+    if args.metrics:
+        if args.watch or (args.workers > 1 and not args.dontlearn):
+            parser.error("-metrics is not supported by -watch nor -workers")
+        metrics = MetricsSink(
+            args.metrics,
+            max_bytes=int(args.metrics_max_mb * (1 << 20)),
+            backups=args.metrics_backups,
+        )
+
     if args.visual:
         import tkinter as tk
 
@@ -60,6 +348,17 @@ def main():
             dontlearn=args.dontlearn,
             nb_r_app=args.red,
             nb_g_app=args.green,
+            qtable=args.qtable,
+            checkpoint=checkpoint,
+            resume=args.resume,
+            learner=learner,
+            profiler=profiler,
+            live=args.live,
+            fps=max(1, args.fps),
+            max_turbo=args.max_turbo,
+            seed=args.seed,
+            metrics=metrics,
+            q_temperature=args.q_temperature,
         )
         app.board.steps = 0
 
@@ -72,29 +371,71 @@ def main():
         def run_game():
             if app.running:
                 state = app.board.get_state()
-                action = app.agent.choose_action(str(state), training=True)
-                direction_mapping = {
-                    "UP": (-1, 0),
-                    "DOWN": (1, 0),
-                    "LEFT": (0, -1),
-                    "RIGHT": (0, 1),
-                }
-                if action in direction_mapping:
-                    app.board.snake_dir = direction_mapping[action]
+                action = app.agent.choose_action(state, training=True)
+                app.board.snake_dir = DELTAS[action]
                 result = app.board.update()
-                if result in ["Ate Green Apple", "Ate Red Apple", "Moved"]:
+                if result not in END_RESULTS:
                     app.board.steps += 1
                 update_stats_label()
-                if result not in ["Game Over", None]:
+                if result not in (GAME_OVER, BOARD_FULL):
                     app.master.after(100, run_game)
                 else:
                     app.running = False
 
-        app.start_training = lambda: [
-            setattr(app, "running", True),
-            run_game(),
-        ]
+        if not args.live:
+            app.start_training = lambda: [
+                setattr(app, "running", True),
+                run_game(),
+            ]
+        if args.watch:
+            app.watch_episodes(read_episodes(args.watch, watched))
         root.mainloop()
+    elif args.watch:
+        COMMAND_LINE.run_watch_mode(
+            args.watch, watched, frame_interval=args.frame_interval or 0.1
+        )
+    elif args.workers > 1 and not args.dontlearn:
+        run_parallel_training(
+            sessions=args.sessions,
+            workers=args.workers,
+            sync_every=args.sync,
+            save_model=args.save,
+            load_model=args.load,
+            board_size=args.size,
+            nb_r_app=args.red,
+            nb_g_app=args.green,
+            qtable=args.qtable,
+            weighting=args.merge,
+            checkpoint=checkpoint,
+            resume=args.resume,
+            learner=learner,
+            seed=args.seed,
+            q_temperature=args.q_temperature,
+        )
+    elif args.headless:
+        COMMAND_LINE.run_headless_mode(
+            sessions=args.sessions,
+            save_model=args.save,
+            load_model=args.load,
+            board_size=args.size,
+            dontlearn=args.dontlearn,
+            nb_r_app=args.red,
+            nb_g_app=args.green,
+            report_every=args.report,
+            qtable=args.qtable,
+            batch=args.batch,
+            checkpoint=checkpoint,
+            resume=args.resume,
+            learner=learner,
+            replay=replay,
+            profiler=profiler,
+            compiled=args.compiled,
+            max_steps=args.max_steps,
+            seed=args.seed,
+            recorder=recorder,
+            metrics=metrics,
+            q_temperature=args.q_temperature,
+        )
     else:
         COMMAND_LINE.run_command_line_mode(
             sessions=args.sessions,
@@ -105,6 +446,17 @@ def main():
             dontlearn=args.dontlearn,
             nb_r_app=args.red,
             nb_g_app=args.green,
+            qtable=args.qtable,
+            checkpoint=checkpoint,
+            resume=args.resume,
+            learner=learner,
+            replay=replay,
+            profiler=profiler,
+            frame_interval=args.frame_interval,
+            seed=args.seed,
+            recorder=recorder,
+            metrics=metrics,
+            q_temperature=args.q_temperature,
         )
 
 
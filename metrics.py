@@ -0,0 +1,164 @@
+# metrics.py
+import json
+import os
+import time
+from collections import deque
+
+# Colonnes d'un enregistrement de session, dans l'ordre du CSV
+FIELDS = (
+    "session",
+    "length",
+    "steps",
+    "score",
+    "exploration_rate",
+    "q_states",
+    "seconds",
+    "elapsed",
+)
+
+# Sessions gardées en mémoire pour l'historique affiché et la moyenne
+# glissante
+HISTORY_WINDOW = 100
+
+
+class RollingStats:
+    """
+    Agrégats de l'entraînement en mémoire bornée : les `window` dernières
+    sessions (numéro, longueur) dans une deque, plus le compte, la somme
+    et le maximum de toutes les sessions.
+    """
+
+    def __init__(self, window=HISTORY_WINDOW):
+        self.recent = deque(maxlen=max(1, window))
+        self.sessions = 0
+        self.total_length = 0
+        self.total_steps = 0
+        self.best_length = 0
+
+    def add(self, session, length, steps=0):
+        self.recent.append((session, length))
+        self.sessions += 1
+        self.total_length += length
+        self.total_steps += steps
+        self.best_length = max(self.best_length, length)
+
+    def mean_length(self):
+        return self.total_length / self.sessions if self.sessions else 0.0
+
+    def recent_mean_length(self):
+        if not self.recent:
+            return 0.0
+        return sum(length for _, length in self.recent) / len(self.recent)
+
+    def summary(self):
+        """Ligne de résumé : moyennes globale et glissante, meilleure."""
+        return (
+            f"Sessions : {self.sessions}"
+            f" | Mean Length : {self.mean_length():.2f}"
+            f" | Last {len(self.recent)} : {self.recent_mean_length():.2f}"
+            f" | Best Length : {self.best_length}"
+        )
+
+
+class MetricsSink:
+    """
+    Flux des métriques de session vers un fichier : CSV si `path` finit
+    par .csv (en-tête en tête de chaque fichier), JSON Lines sinon. Les
+    lignes sont regroupées en mémoire et écrites par blocs d'au moins
+    `buffer_size` caractères. Au-delà de `max_bytes` (0 : jamais), le
+    fichier est renommé en `path`.1 (les anciens en .2, ... jusqu'à
+    `backups`) et un nouveau est commencé, comme RotatingFileHandler ; la
+    rotation se fait au moment d'écrire un bloc.
+    """
+
+    def __init__(
+        self, path, max_bytes=64 << 20, backups=5, buffer_size=1 << 16
+    ):
+        self.path = path
+        self.max_bytes = max(0, max_bytes)
+        self.backups = max(0, backups)
+        self.buffer_size = buffer_size
+        self.csv = path.lower().endswith(".csv")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._pending = []
+        self._pending_size = 0
+        self._open()
+        self.records = 0
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = os.path.getsize(self.path)
+        # Taille du fichier sans aucune session (l'en-tête CSV)
+        self._empty_size = 0
+        if self.csv and not self._size:
+            header = ",".join(FIELDS) + "\n"
+            self._file.write(header)
+            self._size = self._empty_size = len(header)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups:
+            for i in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def record(
+        self, session, length, steps, score, exploration_rate, q_states
+    ):
+        """
+        Ajoute une session terminée ; `seconds` (durée depuis la session
+        précédente) et `elapsed` (depuis la création) sont mesurés ici.
+        """
+        now = time.perf_counter()
+        values = (
+            session,
+            length,
+            steps,
+            score,
+            round(exploration_rate, 6),
+            q_states,
+            round(now - self._last, 6),
+            round(now - self._start, 3),
+        )
+        self._last = now
+        if self.csv:
+            line = ",".join(map(str, values)) + "\n"
+        else:
+            line = json.dumps(dict(zip(FIELDS, values))) + "\n"
+        self._pending.append(line)
+        self._pending_size += len(line)
+        self.records += 1
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            if (
+                self.max_bytes
+                and self._size > self._empty_size
+                and self._size + self._pending_size > self.max_bytes
+            ):
+                self._rotate()
+            self._file.write("".join(self._pending))
+            self._size += self._pending_size
+            self._pending = []
+            self._pending_size = 0
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
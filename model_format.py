@@ -0,0 +1,85 @@
+# model_format.py
+import json
+import struct
+import numpy as np
+
+# Format binaire d'un modèle :
+#   en-tête fixe  : MAGIC, version, taille de l'en-tête JSON,
+#                   nombre d'états, nombre d'actions (petit-boutiste)
+#   en-tête JSON  : paramètres, objets découverts, mur, taille du plateau
+#   remplissage   : jusqu'à un multiple de 8 octets
+#   états         : uint32[nb_states], états encodés (state.encode_state)
+#   Q-values      : float32[nb_states, nb_actions], contigus
+MAGIC = b"L2SQ"
+VERSION = 1
+BINARY_EXTENSION = ".bin"
+_FIXED = struct.Struct("<4sHHIII")
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def is_binary_model(filepath):
+    """Détecte le format binaire par ses octets magiques."""
+    with open(filepath, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_binary_model(fileobj, header, states, q_values):
+    """Écrit un modèle binaire dans un fichier ouvert en mode 'wb'."""
+    states = np.ascontiguousarray(states, dtype="<u4")
+    q_values = np.ascontiguousarray(q_values, dtype="<f4")
+    if q_values.ndim != 2 or len(q_values) != len(states):
+        raise ValueError("Q-values et états de tailles incompatibles")
+    meta = json.dumps(header).encode("utf-8")
+    fileobj.write(
+        _FIXED.pack(
+            MAGIC, VERSION, 0, len(meta), len(states), q_values.shape[1]
+        )
+    )
+    fileobj.write(meta)
+    offset = _FIXED.size + len(meta)
+    fileobj.write(b"\0" * (_align(offset) - offset))
+    fileobj.write(states.tobytes())
+    fileobj.write(q_values.tobytes())
+
+
+def read_binary_model(filepath, mode="c"):
+    """
+    Lit un modèle binaire. Les états et Q-values sont projetés en mémoire
+    (numpy.memmap) sans copie ; le mode "c" (copie à l'écriture) permet de
+    continuer l'apprentissage sans modifier le fichier.
+    Retourne (header, states, q_values).
+    """
+    with open(filepath, "rb") as f:
+        fixed = f.read(_FIXED.size)
+        if len(fixed) < _FIXED.size:
+            raise ValueError(f"Modèle binaire tronqué : {filepath}")
+        magic, version, _, meta_size, nb_states, nb_actions = _FIXED.unpack(
+            fixed
+        )
+        if magic != MAGIC:
+            raise ValueError(f"Ce n'est pas un modèle binaire : {filepath}")
+        if version != VERSION:
+            raise ValueError(f"Version de modèle non supportée : {version}")
+        header = json.loads(f.read(meta_size).decode("utf-8"))
+
+    offset = _align(_FIXED.size + meta_size)
+    if nb_states == 0:
+        return (
+            header,
+            np.zeros(0, dtype="<u4"),
+            np.zeros((0, nb_actions), dtype="<f4"),
+        )
+    states = np.memmap(
+        filepath, dtype="<u4", mode="r", offset=offset, shape=(nb_states,)
+    )
+    q_values = np.memmap(
+        filepath,
+        dtype="<f4",
+        mode=mode,
+        offset=offset + 4 * nb_states,
+        shape=(nb_states, nb_actions),
+    )
+    return header, states, q_values
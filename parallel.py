@@ -0,0 +1,212 @@
+# parallel.py
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from agent import QLearningAgent
+from board import Board
+from cli import COMMAND_LINE
+from core import ACTIONS
+from state import state_key
+
+
+def train_worker(
+    model, sessions, board_size, nb_r_app, nb_g_app, qtable, seed, learner
+):
+    """
+    Entraîne une copie du modèle maître pendant `sessions` sessions, dans un
+    processus du pool. Retourne le modèle obtenu, le nombre de visites de
+    chaque état, le nombre de pas joués et les longueurs des sessions.
+    """
+    # Générateur propre au worker, partagé par son plateau et son agent
+    rng = random.Random(seed)
+    agent = QLearningAgent(
+        actions=ACTIONS, qtable=qtable, learner=learner, rng=rng
+    )
+    agent.set_model(model)
+    board = Board(
+        size=board_size, nb_r_app=nb_r_app, nb_g_app=nb_g_app, rng=rng
+    )
+
+    visits = {}
+    learn = agent.learn
+
+    def counting_learn(state, action, reward, next_state, done=False):
+        visits[state] = visits.get(state, 0) + 1
+        learn(state, action, reward, next_state, done)
+
+    agent.learn = counting_learn
+
+    steps = 0
+    lengths = []
+    for _ in range(sessions):
+        steps += COMMAND_LINE.play_session(board, agent)
+        lengths.append(board.max_length)
+    visits = {state_key(state): count for state, count in visits.items()}
+    return agent.get_model(), visits, steps, lengths
+
+
+def merge_models(models, visits, weighting="visits"):
+    """
+    Fusionne les modèles des workers en un modèle maître.
+
+    Les Q-values sont moyennées état par état, pondérées par le nombre de
+    visites de chaque worker (`weighting="visits"`) ou non (`"mean"`). Les
+    états qu'aucun worker n'a visités gardent la moyenne simple.
+    """
+    weighted = {}
+    plain = {}
+    for model, counts in zip(models, visits):
+        for key, q_values in model["q_table"].items():
+            weight = counts.get(key, 0) if weighting == "visits" else 1
+            total, total_weight = weighted.get(key, ({}, 0))
+            sums, count = plain.get(key, ({}, 0))
+            for action, value in q_values.items():
+                total[action] = total.get(action, 0.0) + weight * value
+                sums[action] = sums.get(action, 0.0) + value
+            weighted[key] = (total, total_weight + weight)
+            plain[key] = (sums, count + 1)
+
+    q_table = {}
+    for key, (total, total_weight) in weighted.items():
+        if total_weight > 0:
+            q_table[key] = {a: v / total_weight for a, v in total.items()}
+        else:
+            sums, count = plain[key]
+            q_table[key] = {a: v / count for a, v in sums.items()}
+
+    discovered_objects = {}
+    for model in models:
+        for obj, reward in model["discovered_objects"].items():
+            discovered_objects[obj] = max(
+                discovered_objects.get(obj, reward), reward
+            )
+
+    # Le worker qui a le mieux déduit le plateau fournit mur et dimensions
+    reference = max(
+        models,
+        key=lambda model: model["board_size"][0] * model["board_size"][1],
+    )
+    merged = dict(reference)
+    merged["q_table"] = q_table
+    merged["discovered_objects"] = discovered_objects
+    merged["exploration_rate"] = min(
+        model["exploration_rate"] for model in models
+    )
+    return merged
+
+
+def run_parallel_training(
+    sessions,
+    workers,
+    sync_every=100,
+    save_model=None,
+    load_model=None,
+    board_size=10,
+    nb_r_app=1,
+    nb_g_app=2,
+    qtable="dict",
+    weighting="visits",
+    checkpoint=None,
+    resume=False,
+    learner=None,
+    seed=None,
+    q_temperature=None,
+):
+    """
+    Entraîne `workers` couples Board/QLearningAgent en parallèle. Toutes les
+    `sync_every` sessions par worker, leurs Q-tables et objets découverts
+    sont fusionnés dans le modèle maître, qui leur est renvoyé.
+    `checkpoint` sauvegarde le modèle maître après chaque fusion.
+    `learner` (voir learners.py) est copié dans chaque worker. Le worker
+    w du tour r reçoit la graine `seed + r * workers + w` (`seed` tirée au
+    hasard si absente). `q_temperature` remplace la température du modèle
+    maître, transmise aux workers avec lui.
+    """
+    master = QLearningAgent(actions=ACTIONS, qtable=qtable)
+    if load_model:
+        master.load_model(load_model)
+        print(f"Modèle chargé depuis : {load_model}")
+    done = 0
+    if checkpoint and resume:
+        done = checkpoint.resume(master)
+        print(f"Reprise depuis {checkpoint.path} : session {done + 1}")
+    if q_temperature is not None:
+        master.q_temperature = q_temperature
+    model = master.get_model()
+
+    print(
+        f"Mode : Learning ({workers} workers) | Sessions : {sessions}"
+        f" | Synchronisation toutes les {sync_every} sessions"
+    )
+    base_seed = seed if seed is not None else random.randrange(2**32)
+    start = time.perf_counter()
+    first_session = done + 1
+    total_steps = 0
+    best_length = 0
+    round_index = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while done < sessions:
+            round_start = time.perf_counter()
+            remaining = sessions - done
+            per_worker = min(sync_every, -(-remaining // workers))
+            shares = [
+                min(per_worker, remaining - w * per_worker)
+                for w in range(workers)
+            ]
+            futures = [
+                pool.submit(
+                    train_worker,
+                    model,
+                    share,
+                    board_size,
+                    nb_r_app,
+                    nb_g_app,
+                    qtable,
+                    base_seed + round_index * workers + w,
+                    learner,
+                )
+                for w, share in enumerate(shares)
+                if share > 0
+            ]
+            results = [future.result() for future in futures]
+            model = merge_models(
+                [result[0] for result in results],
+                [result[1] for result in results],
+                weighting,
+            )
+
+            steps = sum(result[2] for result in results)
+            lengths = [length for result in results for length in result[3]]
+            done += len(lengths)
+            total_steps += steps
+            best_length = max([best_length] + lengths)
+            round_index += 1
+            if checkpoint:
+                master.set_model(model)
+                checkpoint.step(master, done)
+            elapsed = max(time.perf_counter() - round_start, 1e-9)
+            print(
+                f"Session {done}/{sessions}"
+                f" | {len(lengths) / elapsed:.1f} sessions/s"
+                f" | {steps / elapsed:.0f} steps/s"
+                f" | Mean Length : {sum(lengths) / len(lengths):.2f}"
+                f" | Max Length : {max(lengths)}"
+                f" | États : {len(model['q_table'])}"
+            )
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(
+        f"\nTerminé : {sessions - first_session + 1} sessions,"
+        f" {total_steps} steps en"
+        f" {elapsed:.2f}s ({total_steps / elapsed:.0f} steps/s)"
+        f" | Meilleure longueur : {best_length}"
+    )
+
+    master.set_model(model)
+    if checkpoint and first_session <= sessions:
+        checkpoint.save(master, sessions, full=True)
+    if save_model:
+        master.save_model(save_model)
+        print(f"\nModèle sauvegardé dans : {save_model}")
+    return master
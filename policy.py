@@ -0,0 +1,246 @@
+# policy.py
+import math
+import numpy as np
+from core import DELTAS, END_RESULTS, REWARDS
+from state import NB_STATES, decode_state
+
+# Valeurs de la table pour les états sans coup unique
+UNKNOWN = -1  # un objet voisin n'est pas découvert : l'agent joue
+TIED = -2  # plusieurs coups à égalité de récompense : coups notés
+
+# Pénalité de QLearningAgent.choose_action pour un coup vers un piège
+TRAP_PENALTY = 50
+
+# Voisinage lu autour de la tête, un bit par case (1 : libre) : le carré
+# 3x3 et les quatre cases à distance 2 dans l'axe, qui bordent les
+# destinations des coups
+WINDOW = (
+    (-1, -1),
+    (-1, 0),
+    (-1, 1),
+    (0, -1),
+    (0, 0),
+    (0, 1),
+    (1, -1),
+    (1, 0),
+    (1, 1),
+    (-2, 0),
+    (2, 0),
+    (0, -2),
+    (0, 2),
+)
+
+
+def _window_table():
+    """
+    Pour chaque voisinage possible (masque des cases libres de WINDOW),
+    et pour chaque coup : s'il mène à un piège au sens de l'agent (aucune
+    case libre autour de la destination : espace libre 1), et l'étiquette
+    de la zone libre de sa destination dans le carré 3x3 (0 si elle est
+    bloquée). Retourne la liste des (pièges, zones) indexée par masque.
+    """
+    masks = np.arange(1 << len(WINDOW))
+    free = (masks[:, None] >> np.arange(len(WINDOW))) & 1 == 1
+    bit = {cell: index for index, cell in enumerate(WINDOW)}
+    # Zones du carré 3x3 : chaque case libre prend le plus petit indice
+    # de case libre qu'elle atteint, propagé le long des côtés communs
+    labels = np.where(free[:, :9], np.arange(9), 9)
+    edges = [
+        (bit[i, j], bit[i + di, j + dj])
+        for i, j in WINDOW[:9]
+        for di, dj in ((1, 0), (0, 1))
+        if (i + di, j + dj) in bit and abs(i + di) <= 1 and abs(j + dj) <= 1
+    ]
+    for _ in range(8):
+        for a, b in edges:
+            linked = free[:, a] & free[:, b]
+            low = np.minimum(labels[:, a], labels[:, b])
+            labels[linked, a] = low[linked]
+            labels[linked, b] = low[linked]
+    traps = np.zeros((len(masks), len(DELTAS)), dtype=bool)
+    zones = np.zeros((len(masks), len(DELTAS)), dtype=np.int64)
+    for action, (dx, dy) in enumerate(DELTAS):
+        around = [(dx - 1, dy), (dx + 1, dy), (dx, dy - 1), (dx, dy + 1)]
+        traps[:, action] = ~free[:, [bit[cell] for cell in around]].any(
+            axis=1
+        )
+        target = bit[dx, dy]
+        zones[:, action] = np.where(free[:, target], labels[:, target] + 1, 0)
+    return [
+        (tuple(trap), tuple(zone))
+        for trap, zone in zip(traps.tolist(), zones.tolist())
+    ]
+
+
+# Pièges et zones de chaque voisinage possible, indexés par son masque
+WINDOW_TABLE = _window_table()
+
+
+class CompiledPolicy:
+    """
+    Politique figée d'un agent (modèle chargé), pour l'évaluation rapide,
+    qui joue exactement les coups de QLearningAgent.choose_action sans
+    remplir le plateau déduit à chaque pas pour mesurer l'espace libre.
+
+    Les tableaux indexés par l'état encodé donnent le coup de plus forte
+    récompense quand il est unique (`table`), et s'il reste le meilleur
+    même s'il mène à un piège (`safe`) : il est alors joué sans rien
+    lire d'autre. Sinon, les cases libres autour de la tête (WINDOW,
+    d'après l'historique des positions) forment un masque ; WINDOW_TABLE
+    y associe, pour chaque coup, le test de piège de l'agent (espace
+    libre < 2) et la zone libre de sa destination. Les coups à égalité
+    sont notés comme par l'agent (récompense, piège, carte de chaleur) ;
+    si les ex aequo mènent à des cases libres reliées autour de la tête,
+    l'agent leur compterait le même espace libre, et le tirage pondéré
+    par les Q-values est fait ici. Seuls les autres cas (objet inconnu,
+    ex aequo dans des zones peut-être distinctes) sont confiés à l'agent.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.table = np.full(NB_STATES, UNKNOWN, dtype=np.int8)
+        self.safe = np.zeros(NB_STATES, dtype=bool)
+        self.rewards = np.zeros((NB_STATES, len(DELTAS)), dtype=np.float64)
+        discovered = agent.discovered_objects
+        if agent.dontlearn_enabled:
+            for state in range(NB_STATES):
+                objects = decode_state(state)
+                if any(obj not in discovered for obj in objects):
+                    continue
+                rewards = [discovered[obj] for obj in objects]
+                self.rewards[state] = rewards
+                second, best = sorted(rewards)[-2:]
+                if best > second:
+                    self.table[state] = rewards.index(best)
+                    self.safe[state] = best - second > TRAP_PENALTY
+                else:
+                    self.table[state] = TIED
+        # Listes Python : l'indexation scalaire y est plus rapide
+        self._table = self.table.tolist()
+        self._safe = self.safe.tolist()
+        self._rewards = self.rewards.tolist()
+        self._q_values = np.asarray(
+            [agent.q_table.values(state) for state in range(NB_STATES)],
+            dtype=np.float64,
+        ).tolist()
+        # Coups joués par la table seule, notés ici, ou confiés à l'agent
+        self.table_moves = 0
+        self.scored_moves = 0
+        self.agent_moves = 0
+
+    @classmethod
+    def from_agent(cls, agent):
+        """Compile la politique d'un agent, qui reste utilisé par l'objet."""
+        return cls(agent)
+
+    def choose_action(self, state):
+        """Indice (core.ACTIONS) du coup que l'agent choisirait."""
+        agent = self.agent
+        action = self._table[state]
+        if action == UNKNOWN:
+            self.agent_moves += 1
+            return agent.choose_action(state, training=False)
+        if action >= 0 and self._safe[state]:
+            self.table_moves += 1
+        else:
+            traps, zones = WINDOW_TABLE[self._window_mask()]
+            if action >= 0 and not traps[action]:
+                self.table_moves += 1
+            else:
+                action = self._score(state, traps, zones)
+                if action is None:
+                    self.agent_moves += 1
+                    return agent.choose_action(state, training=False)
+                self.scored_moves += 1
+        agent.update_position(action, state)
+        return action
+
+    def _window_mask(self):
+        """Masque des cases de WINDOW dans le plateau et hors historique."""
+        agent = self.agent
+        rows, cols = agent.board_size
+        heatmap = agent.heatmap
+        x, y = agent.current_position
+        mask = 0
+        for bit, (dx, dy) in enumerate(WINDOW):
+            i = x + dx
+            j = y + dy
+            if 0 <= i < rows and 0 <= j < cols and (i, j) not in heatmap:
+                mask |= 1 << bit
+        return mask
+
+    def _score(self, state, traps, zones):
+        """
+        Score de l'agent sans le terme d'espace libre, puis tirage parmi
+        les ex aequo. Retourne None si ce terme pourrait les départager.
+        """
+        agent = self.agent
+        heatmap = agent.heatmap
+        position_x, position_y = agent.current_position
+        scores = []
+        for action, reward in enumerate(self._rewards[state]):
+            dx, dy = DELTAS[action]
+            visits = heatmap.get((position_x + dx, position_y + dy), 0)
+            score = reward + visits * agent.learning_rate
+            if traps[action]:
+                score -= TRAP_PENALTY
+            scores.append(score)
+        max_score = max(scores)
+        best_actions = [
+            action
+            for action, score in enumerate(scores)
+            if score == max_score
+        ]
+        if len(best_actions) == 1:
+            return best_actions[0]
+        zone = zones[best_actions[0]]
+        if not zone or any(zones[action] != zone for action in best_actions):
+            return None
+        # Même tirage que l'agent, sur les Q-values de l'état
+        q_values = self._q_values[state]
+        best_q = max(q_values[action] for action in best_actions)
+        weights = [
+            math.exp((q_values[action] - best_q) / agent.q_temperature)
+            for action in best_actions
+        ]
+        return agent.rng.choices(best_actions, weights)[0]
+
+    def play(self, board, max_steps=None, seed=None, recorder=None):
+        """
+        Joue une partie complète sur `board` sans apprentissage ni
+        affichage, comme evaluate.play_agent. Retourne (nombre de pas,
+        résultat final, ou None si la partie est arrêtée au bout de
+        `max_steps` pas). Avec `seed` et un générateur partagé avec le
+        plateau, la partie est rejouable ; `recorder` (un EpisodeRecorder)
+        l'enregistre.
+        """
+        if recorder is None:
+            board.reset(seed)
+        elif seed is None:
+            recorder.reset(board)
+        else:
+            board.reset(seed)
+            recorder.begin(board, seed)
+        self.agent.reset_history()
+        board.steps = 0
+        choose_action = self.choose_action
+        adjust_history_length = self.agent.adjust_history_length
+        get_state = board.get_state
+        update = board.update
+        while True:
+            action = choose_action(get_state())
+            board.snake_dir = DELTAS[action]
+            result = update()
+            adjust_history_length(REWARDS[result])
+            if recorder is not None:
+                recorder.step(board, action, result)
+            if result in END_RESULTS:
+                steps = board.steps + 1
+                break
+            board.steps += 1
+            if max_steps is not None and board.steps >= max_steps:
+                steps, result = board.steps, None
+                break
+        if recorder is not None:
+            recorder.end()
+        return steps, result
@@ -0,0 +1,130 @@
+# profiler.py
+import cProfile
+import functools
+import time
+
+# Histogramme par puissances de deux : la case k compte les durées de
+# 2^(k-1) à 2^k - 1 nanosecondes
+NB_BUCKETS = 48
+
+
+class PhaseStats:
+    """Nombre d'appels, durées cumulées et histogramme d'une phase."""
+
+    __slots__ = ("calls", "total_ns", "min_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [0] * NB_BUCKETS
+
+    def add(self, duration_ns):
+        self.calls += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.buckets[min(duration_ns.bit_length(), NB_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Borne haute (ns) de la case contenant ce quantile."""
+        rank = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min((1 << bucket) - 1, self.max_ns)
+        return self.max_ns
+
+
+class Profiler:
+    """
+    Chronométrage par phase du pas de jeu : les méthodes instrumentées
+    (Board.update, QLearningAgent.choose_action, rendu...) sont remplacées
+    sur l'instance par une version mesurée avec time.perf_counter_ns.
+    Sans profiler, le code n'est pas modifié et ne coûte rien.
+    `pstats_path` active aussi cProfile et y écrit ses statistiques.
+    """
+
+    def __init__(self, pstats_path=None):
+        self.phases = {}
+        self.pstats_path = pstats_path
+        self._cprofile = cProfile.Profile() if pstats_path else None
+        self._start_ns = time.perf_counter_ns()
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def record(self, phase, duration_ns):
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        stats.add(duration_ns)
+
+    def timed(self, phase, function):
+        """Version chronométrée de `function`, comptée dans `phase`."""
+        clock = time.perf_counter_ns
+        record = self.record
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(phase, clock() - start)
+
+        return wrapper
+
+    def instrument(self, obj, *names, prefix=None):
+        """Chronomètre les méthodes `names` de l'instance `obj`."""
+        prefix = prefix or type(obj).__name__
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self.timed(f"{prefix}.{name}", method))
+
+    def instrument_step(self, board, agent):
+        """Instrumente les phases d'un pas de jeu (plateau et agent)."""
+        self.instrument(board, "update", "get_state")
+        self.instrument(
+            agent,
+            "choose_action",
+            "compute_free_space",
+            "learn",
+            "decay_exploration",
+        )
+
+    def report(self):
+        """Tableau des phases, de la plus coûteuse à la moins coûteuse."""
+        wall_ns = max(time.perf_counter_ns() - self._start_ns, 1)
+        lines = [
+            f"Profil ({wall_ns / 1e9:.2f}s) : les phases imbriquées"
+            " (compute_free_space dans choose_action) se recouvrent",
+            f"{'Phase':<34}{'Appels':>10}{'Total ms':>11}{'%':>7}"
+            f"{'Moy. µs':>10}{'p50 µs':>9}{'p99 µs':>9}{'Max µs':>10}",
+        ]
+        ordered = sorted(
+            self.phases.items(), key=lambda item: -item[1].total_ns
+        )
+        for phase, stats in ordered:
+            lines.append(
+                f"{phase:<34}{stats.calls:>10}"
+                f"{stats.total_ns / 1e6:>11.1f}"
+                f"{100 * stats.total_ns / wall_ns:>7.1f}"
+                f"{stats.total_ns / stats.calls / 1e3:>10.2f}"
+                f"{stats.percentile(0.5) / 1e3:>9.2f}"
+                f"{stats.percentile(0.99) / 1e3:>9.2f}"
+                f"{stats.max_ns / 1e3:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self):
+        """Affiche le rapport et écrit le fichier pstats éventuel."""
+        print("\n" + self.report())
+        if self._cprofile:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.pstats_path)
+            print(f"Statistiques cProfile écrites dans : {self.pstats_path}")
+            self._cprofile.enable()
@@ -0,0 +1,225 @@
+# qtable.py
+import numpy as np
+from state import NB_STATES
+
+
+class DictQTable:
+    """
+    Q-table historique : un dictionnaire état -> liste de Q-values.
+    Les états absents ne sont jamais créés en lecture.
+    """
+
+    def __init__(self, nb_actions):
+        self.nb_actions = nb_actions
+        self.rows = {}
+        self._zeros = (0.0,) * nb_actions
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, state):
+        return state in self.rows
+
+    def clear(self):
+        self.rows.clear()
+
+    def values(self, state):
+        """Q-values d'un état (zéros partagés si l'état est inconnu)."""
+        return self.rows.get(state, self._zeros)
+
+    def get(self, state, action):
+        row = self.rows.get(state)
+        return row[action] if row is not None else 0.0
+
+    def best_value(self, state):
+        row = self.rows.get(state)
+        return max(row) if row is not None else 0.0
+
+    def best_action(self, state):
+        row = self.values(state)
+        return max(range(self.nb_actions), key=row.__getitem__)
+
+    def best_actions(self, states):
+        states = np.asarray(states).tolist()
+        return [self.best_action(state) for state in states]
+
+    def add(self, state, action, delta):
+        row = self.rows.get(state)
+        if row is None:
+            row = self.rows[state] = [0.0] * self.nb_actions
+        row[action] += delta
+
+    def set_row(self, state, values):
+        self.rows[state] = [float(value) for value in values]
+
+    def items(self):
+        return self.rows.items()
+
+    def to_arrays(self):
+        """États (uint32) et Q-values (float32) sous forme de tableaux."""
+        states = np.fromiter(self.rows, dtype=np.uint32, count=len(self.rows))
+        q_values = np.array(list(self.rows.values()), dtype=np.float32)
+        return states, q_values.reshape(len(states), self.nb_actions)
+
+    def load_arrays(self, states, q_values):
+        self.rows = {
+            int(state): [float(value) for value in row]
+            for state, row in zip(states, q_values)
+        }
+
+    def batch_update(
+        self,
+        states,
+        actions,
+        rewards,
+        next_states,
+        gamma,
+        alpha,
+        dones=None,
+        weights=None,
+    ):
+        """
+        Applique une série de mises à jour TD, dans l'ordre. `dones` coupe
+        la cible en fin de partie, `weights` pondère chaque pas.
+        Retourne les erreurs TD.
+        """
+        states = np.asarray(states).tolist()
+        next_states = np.asarray(next_states).tolist()
+        count = len(states)
+        if dones is None:
+            dones = [False] * count
+        if weights is None:
+            weights = [1.0] * count
+        td_errors = np.zeros(count, dtype=np.float32)
+        for i, (state, action, reward, next_state, done, weight) in enumerate(
+            zip(states, actions, rewards, next_states, dones, weights)
+        ):
+            td_target = reward
+            if not done:
+                td_target += gamma * self.best_value(next_state)
+            td_error = td_target - self.get(state, action)
+            self.add(state, action, alpha * weight * td_error)
+            td_errors[i] = td_error
+        return td_errors
+
+
+class ArrayQTable:
+    """
+    Q-table dense : un tableau NumPy float32 de NB_STATES lignes (16
+    octets par état pour 4 actions, 64 Kio en tout) indexé directement
+    par l'état encodé. `known` marque les états déjà mis à jour ; les
+    autres lignes restent à zéro, comme les états absents de DictQTable.
+    Les lots se lisent par `q[states]` ; les pas d'une même paire
+    (état, action) y sont moyennés avant d'être appliqués.
+    """
+
+    def __init__(self, nb_actions):
+        self.nb_actions = nb_actions
+        self.q = np.zeros((NB_STATES, nb_actions), dtype=np.float32)
+        self.known = np.zeros(NB_STATES, dtype=bool)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.known))
+
+    def __contains__(self, state):
+        return bool(self.known[state])
+
+    def clear(self):
+        self.known[:] = False
+        self.q[:] = 0.0
+
+    def values(self, state):
+        return self.q[state]
+
+    def get(self, state, action):
+        return float(self.q[state, action])
+
+    def best_value(self, state):
+        return float(self.q[state].max())
+
+    def best_action(self, state):
+        return int(self.q[state].argmax())
+
+    def best_actions(self, states):
+        """Argmax vectorisé sur un lot d'états."""
+        return self.q[np.asarray(states, dtype=np.int64)].argmax(axis=1)
+
+    def add(self, state, action, delta):
+        self.q[state, action] += delta
+        self.known[state] = True
+
+    def set_row(self, state, values):
+        self.q[state] = values
+        self.known[state] = True
+
+    def items(self):
+        for state in np.flatnonzero(self.known).tolist():
+            yield state, self.q[state]
+
+    def to_arrays(self):
+        states = np.flatnonzero(self.known)
+        return states.astype(np.uint32), self.q[states]
+
+    def load_arrays(self, states, q_values):
+        """Copie les tableaux fournis (par exemple un memmap) dans la table."""
+        states = np.asarray(states, dtype=np.int64)
+        self.clear()
+        self.q[states] = q_values
+        self.known[states] = True
+
+    def batch_update(
+        self,
+        states,
+        actions,
+        rewards,
+        next_states,
+        gamma,
+        alpha,
+        dones=None,
+        weights=None,
+    ):
+        """
+        Applique un lot de mises à jour TD en un seul appel vectorisé.
+        Les cibles sont calculées avec les Q-values d'avant le lot ;
+        `dones` coupe la cible en fin de partie, `weights` pondère chaque
+        pas. Une paire (état, action) présente k fois dans le lot reçoit
+        la moyenne de ses k pas, pas leur somme, qui divergerait.
+        Retourne les erreurs TD.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        next_best = self.q[np.asarray(next_states, dtype=np.int64)].max(
+            axis=1
+        )
+        if dones is not None:
+            next_best[np.asarray(dones, dtype=bool)] = 0.0
+        td_target = np.asarray(rewards, dtype=np.float32) + gamma * next_best
+        td_error = td_target - self.q[states, actions]
+        step = alpha * td_error
+        if weights is not None:
+            step *= np.asarray(weights, dtype=np.float32)
+        pairs, index = np.unique(
+            states * self.nb_actions + actions, return_inverse=True
+        )
+        totals = np.bincount(index, weights=step)
+        counts = np.bincount(index)
+        self.q.reshape(-1)[pairs] += (totals / counts).astype(np.float32)
+        self.known[states] = True
+        return td_error
+
+
+QTABLE_BACKENDS = {
+    "dict": DictQTable,
+    "array": ArrayQTable,
+}
+
+
+def make_qtable(backend, nb_actions):
+    """Crée une Q-table à partir du nom de son backend."""
+    try:
+        return QTABLE_BACKENDS[backend](nb_actions)
+    except KeyError:
+        raise ValueError(
+            f"Backend de Q-table inconnu : {backend} "
+            f"(choix : {', '.join(QTABLE_BACKENDS)})"
+        )
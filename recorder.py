@@ -0,0 +1,274 @@
+# recorder.py
+import os
+import struct
+from board import Board
+from core import ATE_GREEN, ATE_RED, DELTAS
+
+# Journal d'épisodes : suite d'enregistrements ajoutés en fin de fichier
+#   en-tête fixe : EPISODE_MAGIC, graine (-1 si aucune), taille du plateau,
+#                  cases du serpent, pommes vertes, pommes rouges,
+#                  nombre de pas, nombre de pommes reposées
+#   disposition  : uint16[serpent + vertes + rouges], cases à plat
+#   pas          : uint8[pas], action (bits 0-1) | résultat << 2
+#   pommes       : uint16[pommes reposées], case de chaque pomme reposée
+#                  après ATE_GREEN ou ATE_RED, dans l'ordre des pas
+# Les pommes reposées rendent la relecture indépendante du générateur
+# aléatoire. Un enregistrement incomplet en fin de journal est ignoré par
+# la lecture et coupé par EpisodeRecorder avant d'y ajouter des épisodes.
+EPISODE_MAGIC = b"L2SE"
+_EPISODE = struct.Struct("<4sqHBBBII")
+_RESULT_SHIFT = 2
+_ACTION_MASK = (1 << _RESULT_SHIFT) - 1
+
+
+class EpisodeRecorder:
+    """
+    Enregistre des parties dans un journal binaire en ajout seul : un
+    octet par pas, plus la disposition initiale et les pommes reposées.
+    Les épisodes terminés sont regroupés en mémoire et écrits par blocs
+    d'au moins `buffer_size` octets. Un journal existant est d'abord coupé
+    après son dernier épisode complet (écriture interrompue par un crash).
+    """
+
+    def __init__(self, path, buffer_size=1 << 16):
+        self.path = path
+        self.buffer_size = buffer_size
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            size = _complete_size(path)
+            if os.path.getsize(path) > size:
+                os.truncate(path, size)
+        self._file = open(path, "ab")
+        self._pending = bytearray()
+        self._layout = None
+        self._steps = bytearray()
+        self._spawns = []
+        self.episodes = 0
+
+    def reset(self, board):
+        """
+        Relance `board` avec une graine tirée de son générateur, notée
+        dans l'épisode qui commence, et retourne cette graine.
+        """
+        seed = board.rng.getrandbits(63)
+        board.reset(seed)
+        self.begin(board, seed)
+        return seed
+
+    def begin(self, board, seed=None):
+        """Note la disposition initiale de `board` (après son reset)."""
+        size = board.size
+        self._seed = -1 if seed is None else seed
+        self._size = size
+        self._layout = (
+            [x * size + y for x, y in board.snake],
+            [x * size + y for x, y in board.green_apples],
+            [x * size + y for x, y in board.red_apples],
+        )
+        self._steps = bytearray()
+        self._spawns = []
+
+    def step(self, board, action, result):
+        """Ajoute un pas (indice d'action, code de résultat de update)."""
+        self._steps.append(action | result << _RESULT_SHIFT)
+        if result == ATE_GREEN:
+            x, y = board.green_apples[-1]
+            self._spawns.append(x * board.size + y)
+        elif result == ATE_RED:
+            x, y = board.red_apples[-1]
+            self._spawns.append(x * board.size + y)
+
+    def end(self):
+        """Termine l'épisode en cours et le met en attente d'écriture."""
+        if self._layout is None:
+            return
+        snake, green, red = self._layout
+        self._pending += _EPISODE.pack(
+            EPISODE_MAGIC,
+            self._seed,
+            self._size,
+            len(snake),
+            len(green),
+            len(red),
+            len(self._steps),
+            len(self._spawns),
+        )
+        self._pending += struct.pack(
+            f"<{len(snake) + len(green) + len(red)}H",
+            *snake,
+            *green,
+            *red,
+        )
+        self._pending += self._steps
+        self._pending += struct.pack(
+            f"<{len(self._spawns)}H", *self._spawns
+        )
+        self._layout = None
+        self.episodes += 1
+        if len(self._pending) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._pending)
+            self._pending = bytearray()
+        self._file.flush()
+
+    def close(self):
+        """Écrit les épisodes en attente ; un épisode entamé est perdu."""
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _complete_size(path):
+    """
+    Taille du journal jusqu'à la fin de son dernier épisode complet ; un
+    en-tête invalide est traité comme la fin du journal.
+    """
+    total = os.path.getsize(path)
+    end = 0
+    with open(path, "rb") as f:
+        while True:
+            fixed = f.read(_EPISODE.size)
+            if len(fixed) < _EPISODE.size:
+                return end
+            magic, _, _, nb_snake, nb_green, nb_red, nb_steps, nb_spawns = (
+                _EPISODE.unpack(fixed)
+            )
+            if magic != EPISODE_MAGIC:
+                return end
+            payload_size = (
+                2 * (nb_snake + nb_green + nb_red) + nb_steps + 2 * nb_spawns
+            )
+            if end + _EPISODE.size + payload_size > total:
+                return end
+            end += _EPISODE.size + payload_size
+            f.seek(end)
+
+
+class Episode:
+    """Un épisode lu dans le journal ; `replay` le rejoue pas à pas."""
+
+    __slots__ = (
+        "index",
+        "seed",
+        "size",
+        "snake",
+        "green_apples",
+        "red_apples",
+        "steps",
+        "spawns",
+    )
+
+    def __init__(
+        self, index, seed, size, snake, green_apples, red_apples, steps, spawns
+    ):
+        self.index = index
+        self.seed = None if seed < 0 else seed
+        self.size = size
+        self.snake = snake
+        self.green_apples = green_apples
+        self.red_apples = red_apples
+        self.steps = steps
+        self.spawns = spawns
+
+    def __len__(self):
+        return len(self.steps)
+
+    def actions(self):
+        return [step & _ACTION_MASK for step in self.steps]
+
+    def results(self):
+        return [step >> _RESULT_SHIFT for step in self.steps]
+
+    def replay(self):
+        """
+        Générateur de (plateau, action, résultat) après chaque pas. Le
+        même Board est modifié à chaque pas, sans copie : le lire avant
+        de demander le pas suivant.
+        """
+        size = self.size
+        board = Board(
+            size=size,
+            nb_r_app=len(self.red_apples),
+            nb_g_app=len(self.green_apples),
+        )
+        board.set_layout(
+            [divmod(cell, size) for cell in self.snake],
+            [divmod(cell, size) for cell in self.green_apples],
+            [divmod(cell, size) for cell in self.red_apples],
+        )
+        # Les pommes reposées viennent du journal, pas du générateur (un
+        # plateau sans case libre reste sans pomme, comme à l'enregistrement)
+        spawns = iter(self.spawns)
+        board.random_empty_cell = lambda: (
+            divmod(next(spawns), size) if board.free else None
+        )
+        for step in self.steps:
+            action = step & _ACTION_MASK
+            board.snake_dir = DELTAS[action]
+            result = board.update()
+            if result != step >> _RESULT_SHIFT:
+                raise ValueError(
+                    f"Épisode {self.index} incohérent au pas {board.steps}"
+                )
+            yield board, action, result
+            board.steps += 1
+
+
+def read_episodes(path, indices=None):
+    """
+    Générateur des épisodes d'un journal, lus un par un. Avec `indices`
+    (ensemble de numéros d'épisodes), les autres sont sautés sans être
+    décodés.
+    """
+    with open(path, "rb") as f:
+        index = 0
+        while True:
+            fixed = f.read(_EPISODE.size)
+            if len(fixed) < _EPISODE.size:
+                return
+            (
+                magic,
+                seed,
+                size,
+                nb_snake,
+                nb_green,
+                nb_red,
+                nb_steps,
+                nb_spawns,
+            ) = _EPISODE.unpack(fixed)
+            if magic != EPISODE_MAGIC:
+                raise ValueError(f"Journal d'épisodes corrompu : {path}")
+            nb_layout = nb_snake + nb_green + nb_red
+            payload_size = 2 * nb_layout + nb_steps + 2 * nb_spawns
+            if indices is not None and index not in indices:
+                f.seek(payload_size, os.SEEK_CUR)
+                index += 1
+                continue
+            payload = f.read(payload_size)
+            if len(payload) < payload_size:
+                return
+            layout = struct.unpack_from(f"<{nb_layout}H", payload)
+            steps = payload[2 * nb_layout: 2 * nb_layout + nb_steps]
+            spawns = struct.unpack_from(
+                f"<{nb_spawns}H", payload, 2 * nb_layout + nb_steps
+            )
+            yield Episode(
+                index,
+                seed,
+                size,
+                layout[:nb_snake],
+                layout[nb_snake: nb_snake + nb_green],
+                layout[nb_snake + nb_green:],
+                steps,
+                spawns,
+            )
+            index += 1
@@ -0,0 +1,146 @@
+# replay.py
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Mémoire de rejeu : les `capacity` dernières transitions dans des
+    tableaux NumPy pré-alloués utilisés en anneau (la plus ancienne est
+    écrasée). Les mini-lots sont tirés uniformément ou, avec `prioritized`,
+    proportionnellement à |erreur TD| ** alpha, avec des poids
+    d'importance (N * P) ** -beta pour corriger le biais du tirage.
+    Un mini-lot de `batch_size` transitions est rejoué toutes les `every`
+    transitions ajoutées par `step` ou `step_batch`.
+    """
+
+    def __init__(
+        self,
+        capacity,
+        batch_size=32,
+        every=1,
+        prioritized=False,
+        alpha=0.6,
+        beta=0.4,
+        epsilon=1e-3,
+        seed=None,
+    ):
+        if capacity < 1:
+            raise ValueError(f"Capacité de rejeu invalide : {capacity}")
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.every = max(1, every)
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.priorities = np.zeros(capacity, dtype=np.float64)
+        self.max_priority = 1.0
+        self.position = 0
+        self.size = 0
+        self._pending = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done=False):
+        """Ajoute une transition (indice d'action, voir core.ACTIONS)."""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        # Une transition nouvelle est tirée au moins une fois en priorité
+        self.priorities[i] = self.max_priority
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Ajoute un lot de transitions, par exemple celles d'un BatchBoard."""
+        count = len(states)
+        if count > self.capacity:
+            states, actions, rewards, next_states, dones = (
+                np.asarray(array)[-self.capacity:]
+                for array in (states, actions, rewards, next_states, dones)
+            )
+            count = self.capacity
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        self.priorities[slots] = self.max_priority
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Tire un mini-lot. Retourne (indices, états, actions, récompenses,
+        états suivants, fins de partie, poids d'importance ou None).
+        """
+        size = self.size
+        if self.prioritized:
+            scaled = self.priorities[:size] ** self.alpha
+            probabilities = scaled / scaled.sum()
+            indices = self.rng.choice(size, batch_size, p=probabilities)
+            weights = (size * probabilities[indices]) ** -self.beta
+            weights = (weights / weights.max()).astype(np.float32)
+        else:
+            indices = self.rng.integers(0, size, batch_size)
+            weights = None
+        return (
+            indices,
+            self.states[indices],
+            self.actions[indices],
+            self.rewards[indices],
+            self.next_states[indices],
+            self.dones[indices],
+            weights,
+        )
+
+    def update_priorities(self, indices, td_errors):
+        """Nouvelles priorités des transitions rejouées."""
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64))
+        priorities += self.epsilon
+        self.priorities[indices] = priorities
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def step(self, agent, state, action, reward, next_state, done=False):
+        """Ajoute une transition jouée et rejoue si c'est l'heure."""
+        self.add(state, action, reward, next_state, done)
+        self._replay_due(agent, 1)
+
+    def step_batch(self, agent, states, actions, rewards, next_states, dones):
+        """Ajoute un lot de transitions jouées et rejoue si c'est l'heure."""
+        self.add_batch(states, actions, rewards, next_states, dones)
+        self._replay_due(agent, len(states))
+
+    def _replay_due(self, agent, count):
+        self._pending += count
+        while self._pending >= self.every:
+            self._pending -= self.every
+            self.replay(agent)
+
+    def replay(self, agent):
+        """
+        Rejoue un mini-lot dans la Q-table de l'agent en un seul appel
+        vectorisé (QLearningAgent.replay_batch). Ne fait rien tant que la
+        mémoire contient moins de `batch_size` transitions.
+        """
+        if self.size < self.batch_size:
+            return
+        indices, states, actions, rewards, next_states, dones, weights = (
+            self.sample(self.batch_size)
+        )
+        td_errors = agent.replay_batch(
+            states, actions, rewards, next_states, dones, weights
+        )
+        if self.prioritized and td_errors is not None:
+            self.update_priorities(indices, td_errors)
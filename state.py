@@ -0,0 +1,71 @@
+# state.py
+import ast
+
+# Objets visibles par le serpent, dans l'ordre de leur code
+CELLS = ("0", "W", "S", "G", "R")
+CELL_CODES = {cell: code for code, cell in enumerate(CELLS)}
+# Codes des cases, partagés par Board et BatchBoard
+EMPTY = CELL_CODES["0"]
+WALL = CELL_CODES["W"]
+SNAKE = CELL_CODES["S"]
+GREEN = CELL_CODES["G"]
+RED = CELL_CODES["R"]
+CELL_BITS = 3
+CELL_MASK = (1 << CELL_BITS) - 1
+NB_STATES = 1 << (CELL_BITS * 4)
+
+
+def encode_state(cells):
+    """
+    Encode les quatre cases voisines (UP, DOWN, LEFT, RIGHT) en un
+    petit entier : 3 bits par case, UP dans les bits de poids faible.
+    """
+    up, down, left, right = cells
+    return (
+        CELL_CODES[up]
+        | CELL_CODES[down] << CELL_BITS
+        | CELL_CODES[left] << (2 * CELL_BITS)
+        | CELL_CODES[right] << (3 * CELL_BITS)
+    )
+
+
+def _decode(state):
+    return tuple(
+        CELLS[(state >> (i * CELL_BITS)) & CELL_MASK]
+        if ((state >> (i * CELL_BITS)) & CELL_MASK) < len(CELLS)
+        else "?"
+        for i in range(4)
+    )
+
+
+# Table de décodage précalculée : aucun parsing dans la boucle de jeu
+_DECODED = tuple(_decode(state) for state in range(NB_STATES))
+
+
+def decode_state(state):
+    """Retourne le tuple des quatre objets voisins d'un état encodé."""
+    return _DECODED[state]
+
+
+def state_key(state):
+    """Clé texte d'un état, au format historique des modèles JSON."""
+    return str(decode_state(state))
+
+
+def parse_state_key(key):
+    """
+    Convertit une clé de Q-table en état encodé. Accepte les entiers,
+    les entiers sous forme de texte et les anciennes clés
+    "('0', 'W', 'S', 'G')" des modèles JSON existants.
+    """
+    if isinstance(key, int):
+        return key
+    if isinstance(key, (tuple, list)):
+        return encode_state(key)
+    key = key.strip()
+    if key.isdigit():
+        return int(key)
+    cells = ast.literal_eval(key)
+    if len(cells) != 4 or any(cell not in CELL_CODES for cell in cells):
+        raise ValueError(f"Clé d'état invalide : {key}")
+    return encode_state(cells)
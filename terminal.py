@@ -0,0 +1,109 @@
+# terminal.py
+import os
+import sys
+import time
+import numpy as np
+from state import CELLS
+
+ESC = "\x1b["
+CLEAR = ESC + "2J" + ESC + "H"
+CLEAR_LINE = ESC + "K"
+
+
+class TerminalRenderer:
+    """
+    Affichage différentiel du mode ligne de commande par séquences ANSI :
+    l'écran est dessiné entièrement une seule fois, puis chaque image ne
+    réécrit que les cases du plateau et les lignes de texte qui ont changé,
+    en une seule écriture. `frame_interval` (secondes) espace les images :
+    `due` refuse celles qui arrivent plus tôt.
+    """
+
+    def __init__(self, stream=None, frame_interval=0.0):
+        self.stream = stream or sys.stdout
+        self.frame_interval = max(0.0, frame_interval)
+        self._next_frame = 0.0
+        if os.name == "nt":
+            # Active l'interprétation des séquences ANSI de la console
+            os.system("")
+        self.invalidate()
+
+    def invalidate(self):
+        """L'image suivante effacera l'écran et sera dessinée entièrement."""
+        self._size = None
+        self._cells = None
+        self._head = None
+        self._header = []
+        self._footer = []
+
+    def due(self):
+        """Vrai si une nouvelle image peut être dessinée maintenant."""
+        if not self.frame_interval:
+            return True
+        now = time.perf_counter()
+        if now < self._next_frame:
+            return False
+        self._next_frame = now + self.frame_interval
+        return True
+
+    def draw(self, header, board, footer):
+        """
+        Dessine `header` (lignes au-dessus du plateau), le plateau et
+        `footer` (lignes en dessous), puis laisse le curseur sous le tout
+        pour que les `print` suivants s'affichent à la suite.
+        """
+        size = board.size
+        cells = np.frombuffer(board.cells, dtype=np.uint8)
+        head_x, head_y = board.snake[0]
+        head = head_x * size + head_y
+        if self._size != size or len(header) != len(self._header):
+            out = [CLEAR, self._full_screen(header, cells, head, size)]
+            self._footer = []
+            self._size = size
+            self._cells = cells.copy()
+        else:
+            out = []
+            self._diff_lines(out, 1, self._header, header)
+            # Ligne 1 de l'écran = 1re ligne de header, puis "Carte
+            # actuelle", le mur du haut et les lignes du plateau
+            top = len(header) + 3
+            changed = set(np.flatnonzero(cells != self._cells).tolist())
+            if head != self._head:
+                changed.add(head)
+                changed.add(self._head)
+            for index in changed:
+                x, y = divmod(index, size)
+                cell = "H" if index == head else CELLS[cells[index]]
+                out.append(f"{ESC}{top + x};{2 * y + 3}H{cell}")
+            self._cells[:] = cells
+        footer_top = len(header) + size + 4
+        self._diff_lines(out, footer_top, self._footer, footer)
+        out.append(f"{ESC}{footer_top + len(footer)};1H")
+        self._header = list(header)
+        self._footer = list(footer)
+        self._head = head
+        self.stream.write("".join(out))
+        self.stream.flush()
+
+    @staticmethod
+    def _full_screen(header, cells, head, size):
+        wall = "w " * (size + 2)
+        lines = list(header)
+        lines.append("Carte actuelle :")
+        lines.append(wall)
+        for x in range(size):
+            row = [CELLS[code] for code in cells[x * size: (x + 1) * size]]
+            if head // size == x:
+                row[head % size] = "H"
+            lines.append("w " + " ".join(row) + " w")
+        lines.append(wall)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _diff_lines(out, top, old, new):
+        """Réécrit les lignes modifiées, efface celles qui ont disparu."""
+        for i in range(max(len(old), len(new))):
+            line = new[i] if i < len(new) else ""
+            if i < len(old) and old[i] == line:
+                continue
+            out.append(f"{ESC}{top + i};1H{line}{CLEAR_LINE}")
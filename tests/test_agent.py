@@ -0,0 +1,53 @@
+# tests/test_agent.py
+"""
+Tirage de QLearningAgent.choose_action entre coups à égalité : la
+température est enregistrée avec le modèle, et une exécution avec
+`-seed` reste reproductible quelle que soit cette température.
+"""
+import json
+import pytest
+from agent import QLearningAgent
+from cli import COMMAND_LINE
+from core import ACTIONS
+
+
+def train(path, seed, q_temperature, load_model=None):
+    COMMAND_LINE.run_headless_mode(
+        sessions=20,
+        save_model=str(path),
+        load_model=load_model,
+        report_every=1000,
+        seed=seed,
+        q_temperature=q_temperature,
+    )
+    with open(path) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("q_temperature", [None, 0.1])
+def test_seeded_training_is_reproducible(tmp_path, q_temperature):
+    first = train(tmp_path / "a.json", 11, q_temperature)
+    second = train(tmp_path / "b.json", 11, q_temperature)
+    assert first == second
+    expected = 1.0 if q_temperature is None else q_temperature
+    assert first["q_temperature"] == expected
+
+
+def test_q_temperature_is_saved_and_overridden(tmp_path):
+    path = tmp_path / "model.json"
+    train(path, 12, 0.3)
+    agent = QLearningAgent(actions=ACTIONS)
+    agent.load_model(str(path))
+    assert agent.q_temperature == 0.3
+    # Un modèle sans température garde le tirage par défaut
+    with open(path) as f:
+        model = json.load(f)
+    del model["q_temperature"]
+    agent.set_model(model)
+    assert agent.q_temperature == 1.0
+    # Sans l'option, un modèle chargé garde sa température ; avec, elle
+    # est remplacée
+    kept = train(tmp_path / "kept.json", 13, None, str(path))
+    assert kept["q_temperature"] == 0.3
+    replaced = train(tmp_path / "replaced.json", 13, 0.6, str(path))
+    assert replaced["q_temperature"] == 0.6
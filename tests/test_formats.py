@@ -0,0 +1,199 @@
+# tests/test_formats.py
+"""
+Allers-retours des trois formats binaires : modèle (model_format), journal
+des deltas (checkpoint) et journal d'épisodes (recorder), plus la lecture
+d'un fichier tronqué pour chacun.
+"""
+import random
+import numpy as np
+import pytest
+from agent import QLearningAgent
+from board import Board
+from checkpoint import Checkpointer
+from core import ACTIONS, DELTAS, END_RESULTS
+from model_format import read_binary_model
+from recorder import EpisodeRecorder, read_episodes
+
+
+def make_agent(seed, qtable="dict", rows=50):
+    """Agent avec une Q-table et des paramètres non triviaux."""
+    rng = random.Random(seed)
+    agent = QLearningAgent(actions=ACTIONS, qtable=qtable, rng=rng)
+    for _ in range(rows):
+        agent.q_table.set_row(
+            rng.randrange(4096), [rng.uniform(-5, 5) for _ in ACTIONS]
+        )
+    agent.discovered_objects = {"0": -1, "W": -100, "G": 20}
+    agent.wall_obj = "W"
+    agent.board_size = (10, 10)
+    agent.exploration_rate = 0.05
+    agent.q_temperature = 0.25
+    return agent
+
+
+def q_rows(agent):
+    states, q_values = agent.q_table.to_arrays()
+    order = np.argsort(states)
+    return states[order].tolist(), np.asarray(q_values)[order]
+
+
+def assert_same_q(agent, other):
+    states, q_values = q_rows(agent)
+    other_states, other_q_values = q_rows(other)
+    assert states == other_states
+    np.testing.assert_array_equal(
+        q_values.astype(np.float32), other_q_values.astype(np.float32)
+    )
+
+
+@pytest.mark.parametrize("qtable", ["dict", "array"])
+def test_binary_model_round_trip(tmp_path, qtable):
+    agent = make_agent(1, qtable)
+    path = agent.save_model(str(tmp_path / "model.bin"))
+    loaded = QLearningAgent(actions=ACTIONS, qtable=qtable)
+    loaded.load_model(path)
+    assert_same_q(agent, loaded)
+    assert loaded.discovered_objects == agent.discovered_objects
+    assert loaded.board_size == agent.board_size
+    assert loaded.exploration_rate == agent.exploration_rate
+    assert loaded.q_temperature == agent.q_temperature
+
+
+def test_binary_model_saved_over_its_own_file(tmp_path):
+    path = str(tmp_path / "model.bin")
+    make_agent(2, "array").save_model(path)
+    agent = QLearningAgent(actions=ACTIONS, qtable="array")
+    agent.load_model(path)
+    agent.q_table.add(7, 0, 1.5)
+    agent.save_model(path)
+    loaded = QLearningAgent(actions=ACTIONS, qtable="array")
+    loaded.load_model(path)
+    assert_same_q(agent, loaded)
+
+
+def test_truncated_binary_model_is_rejected(tmp_path):
+    path = tmp_path / "model.bin"
+    make_agent(3).save_model(str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+    with pytest.raises(ValueError):
+        read_binary_model(str(path))
+    path.write_bytes(data[:10])
+    with pytest.raises(ValueError):
+        read_binary_model(str(path))
+
+
+def test_checkpoint_deltas_round_trip(tmp_path):
+    checkpoint = Checkpointer(str(tmp_path / "ckpt"), deltas=True)
+    agent = make_agent(4)
+    checkpoint.save(agent, 1, full=True)
+    for session in (2, 3):
+        agent.q_table.add(session, 1, 2.0)
+        agent.exploration_rate /= 2
+        checkpoint.save(agent, session)
+    resumed = QLearningAgent(actions=ACTIONS)
+    assert Checkpointer(checkpoint.path).resume(resumed) == 3
+    assert_same_q(agent, resumed)
+    assert resumed.exploration_rate == agent.exploration_rate
+
+
+def test_checkpoint_ignores_truncated_delta(tmp_path):
+    checkpoint = Checkpointer(str(tmp_path / "ckpt"), deltas=True)
+    agent = make_agent(5)
+    checkpoint.save(agent, 1, full=True)
+    agent.q_table.add(11, 2, 1.0)
+    checkpoint.save(agent, 2)
+    expected = q_rows(agent)
+    size = len(open(checkpoint.delta_path, "rb").read())
+    agent.q_table.add(12, 3, 1.0)
+    checkpoint.save(agent, 3)
+    with open(checkpoint.delta_path, "r+b") as f:
+        f.truncate(size + (f.seek(0, 2) - size) // 2)
+    resumed = QLearningAgent(actions=ACTIONS)
+    assert Checkpointer(checkpoint.path).resume(resumed) == 2
+    states, q_values = q_rows(resumed)
+    assert states == expected[0]
+    np.testing.assert_array_equal(q_values, expected[1])
+
+
+def test_checkpoint_appends_after_truncated_delta(tmp_path):
+    checkpoint = Checkpointer(str(tmp_path / "ckpt"), deltas=True)
+    agent = make_agent(6)
+    checkpoint.save(agent, 1, full=True)
+    agent.q_table.add(11, 2, 1.0)
+    checkpoint.save(agent, 2)
+    size = len(open(checkpoint.delta_path, "rb").read())
+    agent.q_table.add(12, 3, 1.0)
+    checkpoint.save(agent, 3)
+    with open(checkpoint.delta_path, "r+b") as f:
+        f.truncate(size + 5)
+    # Reprise après le crash, puis deux nouveaux deltas
+    resumed = QLearningAgent(actions=ACTIONS)
+    checkpoint = Checkpointer(checkpoint.path, deltas=True)
+    assert checkpoint.resume(resumed) == 2
+    assert len(open(checkpoint.delta_path, "rb").read()) == size
+    for session in (3, 4):
+        resumed.q_table.add(session, 0, 3.0)
+        checkpoint.save(resumed, session)
+    final = QLearningAgent(actions=ACTIONS)
+    assert Checkpointer(checkpoint.path).resume(final) == 4
+    assert_same_q(resumed, final)
+
+
+def record_episodes(path, count, seed):
+    """Joue `count` parties au hasard ; retourne (pas, serpent final)."""
+    rng = random.Random(seed)
+    board = Board(size=8, rng=rng)
+    played = []
+    with EpisodeRecorder(path) as recorder:
+        for _ in range(count):
+            recorder.reset(board)
+            board.steps = 0
+            actions = []
+            while True:
+                action = rng.randrange(len(DELTAS))
+                board.snake_dir = DELTAS[action]
+                result = board.update()
+                recorder.step(board, action, result)
+                actions.append(action)
+                if result in END_RESULTS or len(actions) >= 300:
+                    break
+                board.steps += 1
+            recorder.end()
+            played.append((actions, list(board.snake)))
+    return played
+
+
+def test_episode_log_round_trip(tmp_path):
+    path = str(tmp_path / "runs.l2se")
+    played = record_episodes(path, 5, seed=6)
+    episodes = list(read_episodes(path))
+    assert [episode.index for episode in episodes] == list(range(5))
+    for episode, (actions, snake) in zip(episodes, played):
+        assert episode.actions() == actions
+        board = None
+        for board, _, _ in episode.replay():
+            pass
+        assert list(board.snake) == snake
+    assert [e.index for e in read_episodes(path, {1, 3})] == [1, 3]
+
+
+def test_episode_log_ignores_truncated_tail(tmp_path):
+    path = tmp_path / "runs.l2se"
+    played = record_episodes(str(path), 3, seed=7)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    episodes = list(read_episodes(str(path)))
+    assert len(episodes) == 2
+    assert [e.actions() for e in episodes] == [a for a, _ in played[:2]]
+
+
+def test_episode_log_appends_after_truncated_tail(tmp_path):
+    path = tmp_path / "runs.l2se"
+    played = record_episodes(str(path), 3, seed=8)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    played = played[:2] + record_episodes(str(path), 2, seed=9)
+    episodes = list(read_episodes(str(path)))
+    assert [e.index for e in episodes] == list(range(4))
+    assert [e.actions() for e in episodes] == [a for a, _ in played]
@@ -0,0 +1,35 @@
+# tests/test_policy.py
+"""
+Parité de la politique compilée (policy.CompiledPolicy) avec l'agent :
+à graine égale, les mêmes parties doivent être jouées coup pour coup,
+en ne confiant à l'agent qu'une petite partie des pas.
+"""
+import os
+import random
+import pytest
+from agent import QLearningAgent
+from board import Board
+from core import ACTIONS
+from evaluate import _load_model, evaluate_worker
+from policy import CompiledPolicy
+
+MODELS = os.path.join(os.path.dirname(__file__), os.pardir, "models")
+
+
+@pytest.mark.parametrize("model", ["p10_model_10.json", "p10_model_100.json"])
+def test_compiled_policy_plays_agent_games(model):
+    path = os.path.join(MODELS, model)
+    args = (path, 30, 10, 1, 2, 7, 2000)
+    assert evaluate_worker(*args, True) == evaluate_worker(*args, False)
+
+
+def test_compiled_policy_rarely_falls_back_to_agent():
+    rng = random.Random(3)
+    agent = QLearningAgent(actions=ACTIONS, rng=rng)
+    agent.set_model(_load_model(os.path.join(MODELS, "p10_model_100.json")))
+    policy = CompiledPolicy.from_agent(agent)
+    board = Board(size=10, rng=rng)
+    for _ in range(10):
+        policy.play(board, max_steps=2000)
+    moves = policy.table_moves + policy.scored_moves + policy.agent_moves
+    assert policy.agent_moves < moves / 10
@@ -0,0 +1,60 @@
+# tests/test_qtable.py
+"""
+Mises à jour par lot de ArrayQTable : une paire (état, action) répétée
+dans un même lot ne doit pas recevoir plusieurs fois le même pas.
+"""
+import numpy as np
+from qtable import ArrayQTable, DictQTable
+
+
+def test_duplicate_pairs_get_one_averaged_step():
+    table = ArrayQTable(4)
+    count = 100
+    table.batch_update(
+        [7] * count,
+        [2] * count,
+        [10.0] * count,
+        [9] * count,
+        gamma=0.9,
+        alpha=0.5,
+        dones=[True] * count,
+    )
+    assert table.get(7, 2) == 5.0
+    assert 7 in table and 9 not in table
+
+
+def test_duplicate_pairs_average_their_weighted_steps():
+    table = ArrayQTable(4)
+    td_errors = table.batch_update(
+        [3, 3, 3, 5],
+        [1, 1, 1, 0],
+        [1.0, 2.0, 6.0, 4.0],
+        [0, 0, 0, 0],
+        gamma=0.9,
+        alpha=1.0,
+        dones=[True, True, True, True],
+        weights=[1.0, 1.0, 0.5, 1.0],
+    )
+    assert td_errors.tolist() == [1.0, 2.0, 6.0, 4.0]
+    assert table.get(3, 1) == 2.0
+    assert table.get(5, 0) == 4.0
+
+
+def test_repeated_batches_stay_bounded_like_dict_backend():
+    rng = np.random.default_rng(0)
+    array_table = ArrayQTable(4)
+    dict_table = DictQTable(4)
+    # Quelques états seulement : chaque lot répète beaucoup de paires
+    for _ in range(200):
+        states = rng.integers(0, 8, 1024)
+        actions = rng.integers(0, 4, 1024)
+        rewards = rng.choice([-1.0, 20.0, -100.0], 1024)
+        next_states = rng.integers(0, 8, 1024)
+        for table in (array_table, dict_table):
+            table.batch_update(
+                states, actions, rewards, next_states, gamma=0.9, alpha=0.1
+            )
+    bound = 100.0 / (1 - 0.9)
+    for table in (array_table, dict_table):
+        _, q_values = table.to_arrays()
+        assert np.abs(np.asarray(q_values)).max() <= bound